@@ -0,0 +1,342 @@
+"""
+批量提取多个飞书会议纪要
+
+使用固定数量的长期运行的无头Chrome（每个工作线程一个），依次处理URL队列，
+避免每个会议都重新启动浏览器。提取失败的URL会关闭出错的浏览器，
+由启动了新浏览器的工作线程从检查点继续重试。
+
+用法:
+    python batch_extractor.py URL1 URL2 ... --output-dir outputs
+    python batch_extractor.py --urls-file urls.txt --output-dir outputs --workers 4
+"""
+import argparse
+import json
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+
+from instrumentation import default_report_file, start_run
+from process_memory import PeakRssSampler
+from selenium_extractor import create_driver, extract_with_driver
+
+# 每个无头Chrome大致占用的内存（MB），用于按可用内存计算并发数
+DEFAULT_BROWSER_MEMORY_MB = 500
+
+# 复制用户数据目录时跳过的内容：各工作线程的子目录、正在运行的Chrome留下的锁文件和可以重建的缓存
+PROFILE_COPY_IGNORE = shutil.ignore_patterns("worker-*", "Singleton*", "lockfile", "Cache", "Code Cache",
+                                             "GPUCache", "ShaderCache", "GrShaderCache")
+
+
+def read_urls(urls, urls_file=None):
+    """
+    合并命令行中的URL和URL列表文件（每行一个，# 开头为注释），去除重复
+
+    Returns:
+        list: URL列表，保持原有顺序
+    """
+    candidates = list(urls or [])
+    if urls_file:
+        with open(urls_file, 'r', encoding='utf-8') as f:
+            candidates.extend(line.strip() for line in f)
+    seen = set()
+    result = []
+    for url in candidates:
+        if not url or url.startswith('#') or url in seen:
+            continue
+        seen.add(url)
+        result.append(url)
+    return result
+
+
+def seed_worker_profile(user_data_dir, worker_dir):
+    """
+    第一次使用工作线程的子目录时，从用户数据目录复制一份，复用其中的飞书登录cookie
+
+    子目录已经存在时直接使用（其中的登录状态可能比用户数据目录更新）。
+
+    Returns:
+        bool: 子目录可用（已存在或复制成功）时返回 True；用户数据目录中没有可复制的内容时返回 False
+    """
+    if os.path.isdir(worker_dir):
+        return True
+    if not os.path.isdir(os.path.join(user_data_dir, "Default")):
+        return False
+    tmp_dir = worker_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.copytree(user_data_dir, tmp_dir, ignore=PROFILE_COPY_IGNORE)
+    os.replace(tmp_dir, worker_dir)
+    print(f"已从 {user_data_dir} 复制登录状态到 {worker_dir}")
+    return True
+
+
+def output_name(url, index):
+    """根据会议纪要URL中的token生成输出文件名"""
+    token = url.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+    token = re.sub(r'[^0-9A-Za-z_-]', '_', token)
+    return f"{token}.json" if token else f"meeting_{index}.json"
+
+
+def available_memory_mb():
+    """读取 /proc/meminfo 中的可用内存（MB），无法读取时返回 None"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def default_pool_size(job_count, browser_memory_mb=DEFAULT_BROWSER_MEMORY_MB):
+    """按CPU核数和可用内存计算浏览器数量，不超过URL数量"""
+    size = os.cpu_count() or 1
+    memory = available_memory_mb()
+    if memory is not None:
+        size = min(size, memory // browser_memory_mb)
+    return max(1, min(size, job_count))
+
+
+class BatchJob:
+    """一个待提取的会议纪要"""
+
+    def __init__(self, url, output_file, csv_file=None):
+        self.url = url
+        self.output_file = output_file
+        self.csv_file = csv_file
+        self.attempts = 0
+        self.status = "pending"
+        self.count = 0
+        self.seconds = 0.0
+        self.error = None
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'output': self.output_file,
+            'status': self.status,
+            'count': self.count,
+            'attempts': self.attempts,
+            'seconds': round(self.seconds, 2),
+            'error': self.error
+        }
+
+
+class DriverPool:
+    """
+    复用浏览器的提取工作池
+
+    每个工作线程持有一个 driver 并依次处理队列中的任务；
+    任务失败时关闭该 driver，任务以 resume=True 重新放回队列，
+    由下一个空闲工作线程（使用新启动的浏览器）继续提取。
+    每个 driver 处理 max_jobs_per_driver 个任务后重启，避免长时间运行的浏览器内存持续增长。
+    """
+
+    def __init__(self, workers, retries=1, max_jobs_per_driver=50, extract_options=None, fast=False,
+                 user_data_dir=None):
+        self.workers = workers
+        self.retries = retries
+        self.max_jobs_per_driver = max_jobs_per_driver
+        self.extract_options = dict(extract_options or {})
+        self.fast = fast
+        self.user_data_dir = user_data_dir
+        self.drivers_started = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._done = threading.Event()
+
+    def run(self, jobs):
+        """处理所有任务并等待完成"""
+        if not jobs:
+            return jobs
+        self._remaining = len(jobs)
+        self._done.clear()
+        for job in jobs:
+            self._queue.put(job)
+        threads = [threading.Thread(target=self._worker, args=(index,), daemon=True)
+                   for index in range(min(self.workers, len(jobs)))]
+        for thread in threads:
+            thread.start()
+        self._done.wait()
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+        return jobs
+
+    def _start_driver(self, index):
+        # 同一个用户数据目录不能被多个Chrome同时使用，每个工作线程使用各自的子目录，
+        # 第一次使用时从用户数据目录复制，复用其中的飞书登录状态
+        user_data_dir = None
+        if self.user_data_dir:
+            user_data_dir = os.path.join(self.user_data_dir, f"worker-{index}")
+            if not seed_worker_profile(self.user_data_dir, user_data_dir):
+                print(f"{self.user_data_dir} 中没有Chrome用户数据，{user_data_dir} 需要单独登录飞书")
+        driver = create_driver(self.extract_options.get('source', 'dom'), fast=self.fast, user_data_dir=user_data_dir)
+        with self._lock:
+            self.drivers_started += 1
+        return driver
+
+    def _worker(self, index):
+        driver = None
+        jobs_on_driver = 0
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                error = None
+                # 无论这里出什么错都要结束这次尝试，否则 run() 会一直等待
+                try:
+                    if driver is None or jobs_on_driver >= self.max_jobs_per_driver:
+                        _quit(driver)
+                        driver = None
+                        driver = self._start_driver(index)
+                        jobs_on_driver = 0
+                    jobs_on_driver += 1
+                    started_at = time.monotonic()
+                    metrics = start_run()
+                    metrics.info.update(url=job.url, output_file=job.output_file, attempt=job.attempts + 1,
+                                        worker=index)
+                    try:
+                        job.count = extract_with_driver(driver, job.url, job.output_file, csv_file=job.csv_file,
+                                                        resume=job.attempts > 0, **self.extract_options)
+                    except Exception as e:
+                        error = e
+                        # 出错的浏览器可能已处于异常状态，换新的浏览器重试
+                        _quit(driver)
+                        driver = None
+                    job.seconds += time.monotonic() - started_at
+                    try:
+                        metrics.write(default_report_file(job.output_file))
+                    except Exception as e:
+                        print(f"[{job.url}] 写入运行报告失败: {e}")
+                except Exception as e:
+                    error = error or e
+                finally:
+                    self._finish_attempt(job, error, worker=index)
+        finally:
+            _quit(driver)
+
+    def _finish_attempt(self, job, error, worker=None):
+        job.attempts += 1
+        if error is None:
+            job.status = "ok"
+            job.error = None
+            print(f"[{job.url}] 完成: {job.count} 条对话，{job.seconds:.1f} 秒（工作线程 {worker}）")
+        elif job.attempts <= self.retries:
+            job.error = str(error)
+            print(f"[{job.url}] 第 {job.attempts} 次提取失败，将使用新的浏览器重试: {error}")
+            self._queue.put(job)
+            return
+        else:
+            job.status = "failed"
+            job.error = str(error)
+            print(f"[{job.url}] 提取失败: {error}")
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining == 0:
+                self._done.set()
+
+
+def _quit(driver):
+    if driver is None:
+        return
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def write_summary(jobs, summary_file, elapsed, workers, drivers_started, extra=None):
+    """
+    写出批量提取的汇总JSON
+
+    Args:
+        extra: 附加到汇总中的其他字段，例如峰值内存
+    """
+    records = sum(job.count for job in jobs)
+    summary = {
+        'total': len(jobs),
+        'succeeded': sum(1 for job in jobs if job.status == "ok"),
+        'failed': sum(1 for job in jobs if job.status != "ok"),
+        'records': records,
+        'workers': workers,
+        'drivers_started': drivers_started,
+        'seconds': round(elapsed, 2),
+        'records_per_second': round(records / elapsed, 1) if elapsed > 0 else None
+    }
+    summary.update(extra or {})
+    summary['jobs'] = [job.to_dict() for job in jobs]
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="使用复用的无头Chrome工作池批量提取飞书会议纪要")
+    parser.add_argument("urls", nargs="*", help="会议纪要URL")
+    parser.add_argument("--urls-file", help="URL列表文件，每行一个")
+    parser.add_argument("--output-dir", default="outputs", help="输出目录，默认 outputs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="同时运行的浏览器数量，默认按CPU核数和可用内存计算")
+    parser.add_argument("--browser-memory", type=int, default=DEFAULT_BROWSER_MEMORY_MB,
+                        help=f"计算默认并发数时每个浏览器占用的内存（MB），默认 {DEFAULT_BROWSER_MEMORY_MB}")
+    parser.add_argument("--retries", type=int, default=1, help="失败后使用新浏览器重试的次数，默认 1")
+    parser.add_argument("--max-jobs-per-driver", type=int, default=50, help="每个浏览器处理多少个会议后重启，默认 50")
+    parser.add_argument("--source", choices=["dom", "network"], default="dom", help="数据来源，同 selenium_extractor.py")
+    parser.add_argument("--loader", choices=["observer", "wheel"], default="observer", help="加载方式，同 selenium_extractor.py")
+    parser.add_argument("--csv", action="store_true", help="同时写出同名的CSV文件")
+    parser.add_argument("--fast", action="store_true", help="快速模式，同 selenium_extractor.py")
+    parser.add_argument("--reconcile", action="store_true", help="结束时合并被拆分、截断或重叠的对话，同 selenium_extractor.py")
+    parser.add_argument("--user-data-dir", metavar="DIR",
+                        help="持久化的Chrome用户数据目录，每个浏览器使用其中的 worker-N 子目录（第一次使用时从该目录复制登录状态）")
+    args = parser.parse_args()
+
+    urls = read_urls(args.urls, args.urls_file)
+    if not urls:
+        parser.error("请提供会议纪要URL或 --urls-file")
+    invalid = [url for url in urls if not (url.startswith('http://') or url.startswith('https://'))]
+    if invalid:
+        print(f"以下URL缺少http://或https://前缀: {', '.join(invalid)}")
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = []
+    used_names = set()
+    for index, url in enumerate(urls):
+        name = output_name(url, index)
+        if name in used_names:
+            name = f"{os.path.splitext(name)[0]}_{index}.json"
+        used_names.add(name)
+        output_file = os.path.join(args.output_dir, name)
+        jobs.append(BatchJob(url, output_file, output_file.replace('.json', '.csv') if args.csv else None))
+
+    workers = args.workers or default_pool_size(len(jobs), args.browser_memory)
+    print(f"共 {len(jobs)} 个会议纪要，使用 {workers} 个浏览器")
+    pool = DriverPool(workers, retries=args.retries, max_jobs_per_driver=args.max_jobs_per_driver,
+                      extract_options={'source': args.source, 'loader': args.loader, 'reconcile': args.reconcile},
+                      fast=args.fast, user_data_dir=args.user_data_dir)
+    started_at = time.monotonic()
+    with PeakRssSampler() as sampler:
+        pool.run(jobs)
+    elapsed = time.monotonic() - started_at
+
+    summary_file = os.path.join(args.output_dir, 'batch_summary.json')
+    summary = write_summary(jobs, summary_file, elapsed, workers, pool.drivers_started,
+                            extra={'mode': "driver-pool", 'peak_rss_mb': sampler.peak_mb})
+    print(f"完成 {summary['succeeded']}/{summary['total']} 个会议纪要，共 {summary['records']} 条对话，"
+          f"用时 {elapsed:.1f} 秒（{summary['records_per_second']} 条/秒）")
+    if sampler.peak_mb is not None:
+        print(f"浏览器和本进程的峰值常驻内存: {sampler.peak_mb:.0f} MB")
+    print(f"汇总已保存到 {summary_file}")
+    sys.exit(0 if summary['failed'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
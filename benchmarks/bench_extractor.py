@@ -0,0 +1,166 @@
+"""
+端到端提取基准测试：使用 fake_minutes_server 的模拟妙记页面，在本地离线运行无头Chrome提取
+
+模拟页面与真实页面的DOM结构一致（"文字记录" ud__tabs__tab 标签、rc-virtual-list 虚拟列表、
+带 p-user-name / p-time 属性的 paragraph-editor-wrapper 段落），数据由固定随机种子生成，
+每次运行结果可复现。对每个规模和每种提取配置分别测量：
+
+- 总用时（含浏览器启动）和提取用时
+- WebDriver 命令往返次数（所有经过 driver.execute 的命令，包括元素上的操作），以及各阶段用时和 sleep 时间
+- 每秒提取的对话数
+- 峰值常驻内存（本进程、chromedriver 和 Chrome 进程树）和 Python 堆内存峰值
+- 与生成数据的差异：缺失、多出和内容不一致的对话数
+
+用法:
+    python benchmarks/bench_extractor.py
+    python benchmarks/bench_extractor.py --sizes 100 1000 --configs observer wheel network --json bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_minutes_server import generate_segments, start_server
+from instrumentation import start_run
+from process_memory import PeakRssSampler
+from selenium_extractor import create_driver, extract_with_driver
+
+# 配置名 -> extract_with_driver 参数和是否使用快速模式
+CONFIGS = {
+    'observer': {'loader': "observer", 'source': "dom"},
+    'observer-fast': {'loader': "observer", 'source': "dom", 'fast': True},
+    'wheel': {'loader': "wheel", 'source': "dom", 'engine': "js"},
+    'wheel-dom': {'loader': "wheel", 'source': "dom", 'engine': "dom"},
+    'network': {'loader': "observer", 'source': "network"},
+}
+
+
+def diff_transcript(expected, actual):
+    """
+    比较提取结果与生成的数据
+
+    Returns:
+        dict: 缺失、多出、内容不一致的对话数，以及是否按时间顺序排列
+    """
+    expected_by_key = {(item['speaker'], item['time']): item['content'] for item in expected}
+    actual_by_key = {(item['speaker'], item['time']): item['content'] for item in actual}
+    missing = [key for key in expected_by_key if key not in actual_by_key]
+    extra = [key for key in actual_by_key if key not in expected_by_key]
+    mismatched = [key for key, content in actual_by_key.items()
+                  if key in expected_by_key and expected_by_key[key] != content]
+    order = [(item['speaker'], item['time']) for item in actual if (item['speaker'], item['time']) in expected_by_key]
+    expected_order = [key for key in ((item['speaker'], item['time']) for item in expected) if key in actual_by_key]
+    return {
+        'missing': len(missing),
+        'extra': len(extra),
+        'mismatched': len(mismatched),
+        'ordered': order == expected_order,
+        'examples': [list(key) for key in (missing + extra + mismatched)[:5]]
+    }
+
+
+def run_once(url, segments, config, work_dir):
+    """运行一次提取，返回测量结果"""
+    options = dict(CONFIGS[config])
+    fast = options.pop('fast', False)
+    output_file = os.path.join(work_dir, f"{config}.json")
+    log = io.StringIO()
+    result = {'config': config, 'segments': len(segments)}
+
+    tracemalloc.start()
+    started_at = time.monotonic()
+    metrics = start_run()
+    with PeakRssSampler(interval=0.5) as sampler, contextlib.redirect_stdout(log):
+        # create_driver 会统计每种 WebDriver 命令的次数和用时
+        driver = create_driver(options.get('source', "dom"), fast=fast)
+        extract_started_at = time.monotonic()
+        try:
+            extract_with_driver(driver, url, output_file, **options)
+            result['error'] = None
+        except Exception as e:
+            result['error'] = str(e)
+        finally:
+            extract_seconds = time.monotonic() - extract_started_at
+            driver.quit()
+    elapsed = time.monotonic() - started_at
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report = metrics.to_dict()
+    actual = []
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            actual = json.load(f)
+    result.update({
+        'rows': len(actual),
+        'wall_seconds': round(elapsed, 2),
+        'extract_seconds': round(extract_seconds, 2),
+        'rows_per_second': round(len(actual) / extract_seconds, 1) if extract_seconds > 0 else None,
+        'round_trips': report['round_trips'],
+        'sleep_seconds': report['sleep_seconds'],
+        'commands': report['webdriver_commands'],
+        'phases': report['phases'],
+        'counters': report['counters'],
+        'peak_rss_mb': round(sampler.peak_mb, 1) if sampler.peak_mb is not None else None,
+        'python_heap_peak_mb': round(heap_peak / 1024 / 1024, 1),
+        'diff': diff_transcript(segments, actual)
+    })
+    if result['error']:
+        result['log_tail'] = log.getvalue().splitlines()[-20:]
+    return result
+
+
+def format_row(result):
+    diff = result['diff']
+    correct = "OK" if not (diff['missing'] or diff['extra'] or diff['mismatched']) and diff['ordered'] else (
+        f"-{diff['missing']} +{diff['extra']} ~{diff['mismatched']}" + ("" if diff['ordered'] else " 乱序"))
+    rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] is not None else "-"
+    rate = f"{result['rows_per_second']:.1f}" if result['rows_per_second'] is not None else "-"
+    return (f"{result['segments']:>7} {result['config']:>14} {result['wall_seconds']:>8.1f} "
+            f"{result['extract_seconds']:>8.1f} {result['round_trips']:>7} {rate:>8} {rss:>8} "
+            f"{result['python_heap_peak_mb']:>7.1f}  {correct}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="使用本地模拟页面的端到端提取基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="模拟会议的对话数")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=["observer", "wheel", "network"],
+                        help="要测试的提取配置")
+    parser.add_argument("--seed", type=int, default=0, help="生成模拟数据的随机种子")
+    parser.add_argument("--render-delay", type=int, default=30, help="模拟页面滚动后渲染的延迟（毫秒）")
+    parser.add_argument("--json", metavar="FILE", help="把完整结果（包括每种命令的次数）保存为JSON")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'对话数':>7} {'配置':>14} {'总用时s':>8} {'提取s':>8} {'往返':>7} {'条/秒':>8} {'RSS MB':>8} "
+          f"{'堆 MB':>7}  结果")
+    for size in args.sizes:
+        segments = generate_segments(size, seed=args.seed)
+        server, url = start_server(segments, render_delay_ms=args.render_delay)
+        try:
+            with tempfile.TemporaryDirectory() as work_dir:
+                for config in args.configs:
+                    result = run_once(url, segments, config, work_dir)
+                    results.append(result)
+                    print(format_row(result))
+                    if result['error']:
+                        print(f"  运行出错: {result['error']}")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"完整结果已保存到 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
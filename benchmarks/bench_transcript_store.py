@@ -0,0 +1,88 @@
+"""
+TranscriptStore 与原线性去重算法的单次扫描耗时对比
+
+模拟虚拟列表每次扫描读取到约30个已渲染段落（其中1条为新对话），
+分别测量会议记录增长到不同规模时单次扫描的平均耗时。
+
+用法: python benchmarks/bench_transcript_store.py [--sizes 1000 5000 10000 20000]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_store import TranscriptStore
+
+RENDERED_ROWS = 30
+
+
+def format_time(seconds):
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def make_row(i):
+    return (f"说话人 {i % 4 + 1}", format_time(i * 3), f"第{i}段对话内容。" * 5)
+
+
+def legacy_sweep(saved_transcript, current_content, rows):
+    """原 extract_and_save_content 的去重、排序和哈希逻辑（不含文件写入）"""
+    latest_content = {}
+    for speaker, timestamp, content in rows:
+        dialog_key = f"{speaker}_{timestamp}"
+        if dialog_key not in latest_content or len(content) > len(latest_content[dialog_key]['content']):
+            latest_content[dialog_key] = {'speaker': speaker, 'time': timestamp, 'content': content}
+    for dialog_key, dialog_data in latest_content.items():
+        existing_index = None
+        for i, item in enumerate(saved_transcript):
+            if item['speaker'] == dialog_data['speaker'] and item['time'] == dialog_data['time']:
+                existing_index = i
+                break
+        if existing_index is None:
+            saved_transcript.append(dialog_data)
+            current_content.append(dialog_key)
+        elif len(dialog_data['content']) > len(saved_transcript[existing_index]['content']):
+            saved_transcript[existing_index] = dialog_data
+    saved_transcript.sort(key=lambda x: x['time'])
+    return hashlib.md5(str(current_content).encode()).hexdigest()
+
+
+def bench_legacy(size, sweeps):
+    saved_transcript = []
+    current_content = []
+    legacy_sweep(saved_transcript, current_content, [make_row(i) for i in range(size)])
+    start = time.perf_counter()
+    for n in range(sweeps):
+        tail = size + n
+        legacy_sweep(saved_transcript, current_content, [make_row(i) for i in range(tail - RENDERED_ROWS + 1, tail + 1)])
+    return (time.perf_counter() - start) / sweeps
+
+
+def bench_store(size, sweeps):
+    store = TranscriptStore()
+    store.add_rows([make_row(i) for i in range(size)])
+    start = time.perf_counter()
+    for n in range(sweeps):
+        tail = size + n
+        store.add_rows([make_row(i) for i in range(tail - RENDERED_ROWS + 1, tail + 1)])
+        store.fingerprint_hex()
+    return (time.perf_counter() - start) / sweeps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TranscriptStore 单次扫描耗时基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 20000])
+    parser.add_argument("--sweeps", type=int, default=50, help="每个规模执行的扫描次数")
+    args = parser.parse_args()
+
+    print(f"{'对话数':>8} {'原算法(ms/次)':>14} {'TranscriptStore(ms/次)':>24}")
+    for size in args.sizes:
+        legacy = bench_legacy(size, args.sweeps)
+        store = bench_store(size, args.sweeps)
+        print(f"{size:>8} {legacy * 1000:>14.3f} {store * 1000:>24.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+把提取结果流式导出为 CSV、JSONL、SRT/WebVTT 字幕和列式存储（Parquet）
+
+输入可以是 output.json（JSON数组）、JSONL（例如预写日志或合并的语料），
+也可以是保存的HTML页面。JSON和JSONL按记录增量读取，一次读取同时写出所有选择的格式，
+内存占用与文件大小无关，可以处理多GB的合并语料。
+
+用法:
+    python exporter.py output.json --csv output.csv
+    python exporter.py corpus.jsonl --jsonl merged.jsonl --srt meeting.srt --vtt meeting.vtt
+    python exporter.py output.json --parquet output.parquet   # 需要安装 pyarrow
+"""
+import argparse
+import csv
+import json
+import os
+
+from transcript_store import parse_time_to_seconds
+
+READ_CHUNK_SIZE = 1 << 16
+
+# 字幕结束时间：下一条的开始时间，但不超过按字数估计的显示时长
+SUBTITLE_SECONDS_PER_CHAR = 0.3
+SUBTITLE_MIN_SECONDS = 2
+SUBTITLE_MAX_SECONDS = 30
+
+
+def iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """
+    增量读取JSON数组中的每个元素
+
+    每次只保留一个分块和尚未解析完的元素，内存占用与数组长度无关。
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+    while True:
+        # 跳过空白和逗号，必要时读取下一块
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        if pos >= len(buffer):
+            if started:
+                raise ValueError("JSON数组不完整")
+            return
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError("输入不是JSON数组")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if not eof and (end == len(buffer) or buffer[end] in '.eE+-'):
+            # 顶层数字可能被分块截断（如 123 被分成 12 和 3，或 1.5 只读到 1.），读入下一块后重新解析
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def iter_jsonl(f):
+    """逐行读取JSONL，最后一行不完整（写入时崩溃）时忽略"""
+    pending_error = None
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if pending_error is not None:
+            raise pending_error
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            pending_error = e
+
+
+def iter_records(input_file):
+    """
+    按顺序逐条读取对话记录
+
+    根据内容判断格式：以 [ 开头为JSON数组，否则按JSONL读取；.html/.htm 文件用 transcript_parser 解析。
+    """
+    if input_file.lower().endswith(('.html', '.htm')):
+        from transcript_parser import parse_html
+
+        with open(input_file, 'r', encoding='utf-8', errors='replace') as f:
+            yield from parse_html(f.read())
+        return
+
+    with open(input_file, 'r', encoding='utf-8-sig') as f:
+        head = f.read(READ_CHUNK_SIZE).lstrip()
+        f.seek(0)
+        if head.startswith('['):
+            yield from iter_json_array(f)
+        else:
+            yield from iter_jsonl(f)
+
+
+def _subtitle_timestamp(seconds, separator):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+class CsvExporter:
+    """与 output_sink.write_csv 相同的表头和列"""
+
+    def __init__(self, output_file):
+        self._file = open(output_file, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['说话人', '时间', '内容'])
+
+    def write(self, record):
+        self._writer.writerow([record['speaker'], record['time'], record['content']])
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlExporter:
+    """每行一条记录，与预写日志的格式相同"""
+
+    def __init__(self, output_file):
+        self._file = open(output_file, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+
+class SubtitleExporter:
+    """
+    SRT 字幕；以 time 字段为开始时间，结束时间取下一条的开始时间，
+    但不超过按字数估计的显示时长。为了知道下一条的开始时间，只缓存一条记录。
+    时间无法解析的记录跳过。
+    """
+
+    def __init__(self, output_file):
+        self._file = open(output_file, 'w', encoding='utf-8')
+        self._pending = None
+        self.cues = 0
+        self._write_header()
+
+    def _write_header(self):
+        pass
+
+    def write(self, record):
+        start = parse_time_to_seconds(record.get('time'))
+        if start is None:
+            return
+        if self._pending is not None:
+            self._flush(start)
+        self._pending = (start, record)
+
+    def _flush(self, next_start=None):
+        start, record = self._pending
+        duration = len(record['content']) * SUBTITLE_SECONDS_PER_CHAR
+        end = start + min(SUBTITLE_MAX_SECONDS, max(SUBTITLE_MIN_SECONDS, duration))
+        if next_start is not None and start < next_start < end:
+            end = next_start
+        self.cues += 1
+        self._write_cue(self.cues, start, end, record)
+        self._pending = None
+
+    def _write_cue(self, index, start, end, record):
+        self._file.write(f"{index}\n{_subtitle_timestamp(start, ',')} --> {_subtitle_timestamp(end, ',')}\n"
+                         f"{record['speaker']}: {record['content']}\n\n")
+
+    def close(self):
+        if self._pending is not None:
+            self._flush()
+        self._file.close()
+
+
+class VttExporter(SubtitleExporter):
+    """WebVTT 字幕，说话人写在 <v> 标签中"""
+
+    def _write_header(self):
+        self._file.write("WEBVTT\n\n")
+
+    def _write_cue(self, index, start, end, record):
+        speaker = record['speaker'].replace('>', ' ')
+        self._file.write(f"{_subtitle_timestamp(start, '.')} --> {_subtitle_timestamp(end, '.')}\n"
+                         f"<v {speaker}>{record['content']}\n\n")
+
+
+class ParquetExporter:
+    """
+    Parquet 列式存储（speaker、time、seconds、content 四列），按批写入行组
+
+    需要安装 pyarrow。
+    """
+
+    def __init__(self, output_file, batch_size=50000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("导出Parquet需要安装pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema([
+            ('speaker', pa.string()), ('time', pa.string()), ('seconds', pa.int64()), ('content', pa.string())
+        ])
+        self._writer = pq.ParquetWriter(output_file, self._schema, compression='zstd')
+        self._batch_size = batch_size
+        self._columns = ([], [], [], [])
+
+    def write(self, record):
+        speakers, times, seconds, contents = self._columns
+        speakers.append(record['speaker'])
+        times.append(record['time'])
+        seconds.append(parse_time_to_seconds(record['time']))
+        contents.append(record['content'])
+        if len(speakers) >= self._batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._columns[0]:
+            arrays = [self._pa.array(column, type=field.type) for column, field in zip(self._columns, self._schema)]
+            self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+            self._columns = ([], [], [], [])
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'jsonl': JsonlExporter,
+    'srt': SubtitleExporter,
+    'vtt': VttExporter,
+    'parquet': ParquetExporter,
+}
+
+
+def export(input_file, outputs):
+    """
+    读取一遍输入，同时写出所有格式
+
+    Args:
+        input_file: JSON、JSONL 或 HTML 文件
+        outputs: {格式: 输出文件}，格式为 EXPORTERS 中的键
+
+    Returns:
+        int: 导出的记录数
+    """
+    exporters = []
+    try:
+        for fmt, output_file in outputs.items():
+            exporters.append(EXPORTERS[fmt](output_file))
+        records = 0
+        for record in iter_records(input_file):
+            records += 1
+            for exporter in exporters:
+                exporter.write(record)
+    finally:
+        for exporter in exporters:
+            exporter.close()
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把会议记录导出为CSV、JSONL、SRT/WebVTT字幕或Parquet")
+    parser.add_argument("input_file", help="output.json、JSONL文件或保存的HTML页面")
+    for fmt in EXPORTERS:
+        parser.add_argument(f"--{fmt}", metavar="FILE", help=f"导出为{fmt.upper()}")
+    parser.add_argument("--all", action="store_true", help="导出为CSV、JSONL、SRT和VTT，文件名与输入同名")
+    args = parser.parse_args()
+
+    outputs = {fmt: getattr(args, fmt) for fmt in EXPORTERS if getattr(args, fmt)}
+    if args.all:
+        base = os.path.splitext(args.input_file)[0]
+        for fmt in ('csv', 'jsonl', 'srt', 'vtt'):
+            outputs.setdefault(fmt, f"{base}.{fmt}")
+    if not outputs:
+        parser.error("请至少指定一种导出格式，例如 --csv output.csv")
+    if os.path.abspath(args.input_file) in {os.path.abspath(path) for path in outputs.values()}:
+        parser.error("输出文件不能与输入文件相同")
+
+    records = export(args.input_file, outputs)
+    for fmt, output_file in outputs.items():
+        print(f"已导出 {fmt.upper()}: {output_file}")
+    print(f"共导出 {records} 条对话")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+本地模拟的飞书妙记页面和文字记录接口，用于离线测试提取工具
+
+页面结构与真实页面一致：带"文字记录"的 ud__tabs__tab 标签、rc-virtual-list 虚拟列表、
+paragraph-editor-wrapper 段落（p-user-name / p-time 属性和 data-string/data-leaf 内容span）。
+点击"文字记录"后页面通过 fetch 请求 /minutes/api/subtitles_v2 获取文字记录，
+虚拟列表只渲染可视区域附近的段落。
+
+用法:
+    python fake_minutes_server.py --segments 1000
+    python fake_minutes_server.py --transcript output.json --port 8765
+
+然后访问 http://127.0.0.1:8765/minutes/fake-meeting
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from transcript_store import parse_time_to_seconds
+
+SUBTITLES_API_PATH = "/minutes/api/subtitles_v2"
+
+_PHRASES = [
+    "声音有点小啊。", "现在听得到吗？", "我们先看一下上周的数据。", "这个方案我觉得可以再讨论一下。",
+    "好，谢谢。", "嗯，对。", "你说的这个点很关键。", "大家有没有其他问题？", "我补充一下背景。",
+    "后面我们再私下聊吧。", "这个需求下周上线。", "用户反馈主要集中在两个方面。", "的。",
+    "然后我们看第二部分。", "对，就是这个意思。", "我这边没有问题。"
+]
+
+
+def format_seconds(seconds):
+    """秒数转换为 HH:MM:SS"""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def generate_segments(count, seed=0, speakers=4):
+    """
+    生成确定性的模拟会议记录
+
+    Returns:
+        list: 与 output.json 格式相同的对话列表
+    """
+    rng = random.Random(seed)
+    segments = []
+    seconds = 60
+    for _ in range(count):
+        sentences = rng.randint(1, 6)
+        segments.append({
+            'speaker': f"说话人 {rng.randint(1, speakers)}",
+            'time': format_seconds(seconds),
+            'content': ''.join(rng.choice(_PHRASES) for _ in range(sentences))
+        })
+        seconds += rng.randint(1, 30)
+    return segments
+
+
+def _split_sentences(content):
+    """按中文句末标点切分，模拟页面中每句一个 span"""
+    sentences = []
+    current = ""
+    for char in content:
+        current += char
+        if char in "。？！":
+            sentences.append(current)
+            current = ""
+    if current:
+        sentences.append(current)
+    return sentences
+
+
+def build_subtitles_payload(segments):
+    """按飞书妙记 subtitles 接口的结构组织文字记录"""
+    paragraphs = []
+    for index, segment in enumerate(segments):
+        start_ms = (parse_time_to_seconds(segment['time']) or 0) * 1000
+        paragraphs.append({
+            'pid': f"p{index}",
+            'start_time': start_ms,
+            'speaker': {'user_name': segment['speaker']},
+            'sentences': [{'contents': [{'content': sentence}]} for sentence in _split_sentences(segment['content'])]
+        })
+    return {'code': 0, 'data': {'paragraphs': paragraphs, 'has_more': False}}
+
+
+PAGE_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>模拟妙记</title>
+<style>
+body { margin: 0; font-family: sans-serif; }
+.ud__tabs { display: flex; gap: 16px; padding: 12px; border-bottom: 1px solid #ddd; }
+.ud__tabs__tab { cursor: pointer; padding: 4px 8px; }
+.transcript-content { display: none; }
+.transcript-tab.right-tab-visible .transcript-content { display: block; }
+.rc-virtual-list-holder { height: 600px; overflow-y: auto; position: relative; }
+.rc-virtual-list-holder-inner { position: absolute; left: 0; right: 0; }
+.paragraph-editor-wrapper { height: __ROW_HEIGHT__px; overflow: hidden; box-sizing: border-box; padding: 8px; }
+.p-user-name, .p-time { display: inline-block; margin-right: 8px; color: #666; }
+</style>
+</head>
+<body>
+<div class="ud__tabs">
+  <div class="ud__tabs__tab">智能纪要</div>
+  <div class="ud__tabs__tab" id="transcript-tab">文字记录</div>
+</div>
+<div class="transcript-tab">
+  <div class="transcript-content">
+    <div class="rc-virtual-list">
+      <div class="rc-virtual-list-holder">
+        <div class="rc-virtual-list-spacer"></div>
+        <div class="rc-virtual-list-holder-inner"></div>
+      </div>
+    </div>
+  </div>
+</div>
+<script>
+(function () {
+  var ROW_HEIGHT = __ROW_HEIGHT__, OVERSCAN = 4, RENDER_DELAY = __RENDER_DELAY__;
+  var token = location.pathname.split('/').pop();
+  var paragraphs = [];
+  var holder = document.querySelector('.rc-virtual-list-holder');
+  var inner = document.querySelector('.rc-virtual-list-holder-inner');
+  var spacer = document.querySelector('.rc-virtual-list-spacer');
+  var pendingRender = null;
+
+  function formatTime(ms) {
+    var s = Math.floor(ms / 1000);
+    function pad(n) { return (n < 10 ? '0' : '') + n; }
+    return pad(Math.floor(s / 3600)) + ':' + pad(Math.floor(s % 3600 / 60)) + ':' + pad(s % 60);
+  }
+
+  function renderRow(p) {
+    var row = document.createElement('div');
+    row.className = 'paragraph-editor-wrapper';
+    var name = document.createElement('div');
+    name.className = 'p-user-name';
+    name.setAttribute('user-name-content', p.speaker.user_name);
+    name.textContent = p.speaker.user_name;
+    var time = document.createElement('div');
+    time.className = 'p-time';
+    time.setAttribute('time-content', formatTime(p.start_time));
+    time.textContent = formatTime(p.start_time);
+    var text = document.createElement('div');
+    p.sentences.forEach(function (sentence) {
+      sentence.contents.forEach(function (c) {
+        var span = document.createElement('span');
+        span.setAttribute('data-string', 'true');
+        span.setAttribute('data-leaf', 'true');
+        span.textContent = c.content;
+        text.appendChild(span);
+      });
+    });
+    var enter = document.createElement('span');
+    enter.setAttribute('data-string', 'true');
+    enter.setAttribute('data-leaf', 'true');
+    enter.setAttribute('data-enter', 'true');
+    enter.textContent = '\\n';
+    text.appendChild(enter);
+    row.appendChild(name);
+    row.appendChild(time);
+    row.appendChild(text);
+    return row;
+  }
+
+  function render() {
+    pendingRender = null;
+    var first = Math.max(0, Math.floor(holder.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    var last = Math.min(paragraphs.length, Math.ceil((holder.scrollTop + holder.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+    inner.style.transform = 'translateY(' + (first * ROW_HEIGHT) + 'px)';
+    var fragment = document.createDocumentFragment();
+    for (var i = first; i < last; i++) {
+      fragment.appendChild(renderRow(paragraphs[i]));
+    }
+    inner.replaceChildren(fragment);
+  }
+
+  function scheduleRender() {
+    if (pendingRender === null) {
+      pendingRender = setTimeout(render, RENDER_DELAY);
+    }
+  }
+
+  holder.addEventListener('scroll', scheduleRender);
+  holder.addEventListener('wheel', function (e) {
+    // 与 rc-virtual-list 一样响应脚本派发的滚轮事件
+    if (!e.isTrusted) {
+      holder.scrollTop += e.deltaY;
+    }
+  });
+
+  document.getElementById('transcript-tab').addEventListener('click', function () {
+    document.querySelector('.transcript-tab').classList.add('right-tab-visible');
+    fetch('__API_PATH__?object_token=' + encodeURIComponent(token))
+      .then(function (r) { return r.json(); })
+      .then(function (payload) {
+        paragraphs = payload.data.paragraphs;
+        spacer.style.height = (paragraphs.length * ROW_HEIGHT) + 'px';
+        render();
+      });
+  });
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def make_handler(segments, row_height=96, render_delay_ms=30):
+    """创建提供模拟页面和接口的请求处理类"""
+    payload = json.dumps(build_subtitles_payload(segments), ensure_ascii=False).encode('utf-8')
+    page = (PAGE_HTML.replace('__ROW_HEIGHT__', str(row_height))
+            .replace('__RENDER_DELAY__', str(render_delay_ms))
+            .replace('__API_PATH__', SUBTITLES_API_PATH)).encode('utf-8')
+
+    class FakeMinutesHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == SUBTITLES_API_PATH:
+                self._send(200, 'application/json; charset=utf-8', payload)
+            elif path.startswith('/minutes/'):
+                self._send(200, 'text/html; charset=utf-8', page)
+            else:
+                self._send(404, 'text/plain; charset=utf-8', b'not found')
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeMinutesHandler
+
+
+def start_server(segments, host="127.0.0.1", port=0, **handler_options):
+    """
+    在后台线程中启动模拟服务器
+
+    Returns:
+        tuple: (服务器对象, 页面URL)；调用 server.shutdown() 停止
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(segments, **handler_options))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://{host}:{server.server_address[1]}/minutes/fake-meeting"
+    return server, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的飞书妙记页面和文字记录接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--transcript", help="使用已有的JSON会议记录作为数据，例如 output.json")
+    parser.add_argument("--segments", type=int, default=200, help="未指定 --transcript 时生成的对话数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.transcript:
+        with open(args.transcript, 'r', encoding='utf-8') as f:
+            segments = json.load(f)
+    else:
+        segments = generate_segments(args.segments, args.seed)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(segments))
+    print(f"模拟妙记页面: http://{args.host}:{args.port}/minutes/fake-meeting （共 {len(segments)} 条对话）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+提取过程的计时和计数，运行结束后写出JSON运行报告
+
+每个线程有各自的当前运行（start_run() 开始一次新的统计），
+各模块通过 span() 统计阶段用时、count() 累加计数、sleep() 代替 time.sleep 以便把等待时间单独统计；
+instrument_driver() 统计每种 WebDriver 命令的次数和用时。
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+def default_report_file(output_file):
+    """output.json 对应的运行报告为 output.report.json"""
+    return os.path.splitext(output_file)[0] + ".report.json"
+
+
+def default_profile_file(output_file):
+    """output.json 对应的 cProfile 数据为 output.prof"""
+    return os.path.splitext(output_file)[0] + ".prof"
+
+
+class RunMetrics:
+    """一次提取的阶段用时、WebDriver 命令、等待时间和计数"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self.phases = defaultdict(lambda: [0, 0.0])
+        self.commands = defaultdict(lambda: [0, 0.0])
+        self.counters = Counter()
+        self.sleep_seconds = 0.0
+        self.info = {}
+
+    def span_enter(self):
+        return time.monotonic()
+
+    def span_exit(self, name, entered_at):
+        phase = self.phases[name]
+        phase[0] += 1
+        phase[1] += time.monotonic() - entered_at
+
+    def record_command(self, command, seconds):
+        entry = self.commands[command]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def to_dict(self):
+        wall = time.monotonic() - self._started
+        webdriver_seconds = sum(seconds for _, seconds in self.commands.values())
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'wall_seconds': round(wall, 3),
+            'sleep_seconds': round(self.sleep_seconds, 3),
+            'webdriver_seconds': round(webdriver_seconds, 3),
+            'work_seconds': round(max(0.0, wall - self.sleep_seconds - webdriver_seconds), 3),
+            'phases': {name: {'count': count, 'seconds': round(seconds, 3)}
+                       for name, (count, seconds) in self.phases.items()},
+            'webdriver_commands': {name: {'count': count, 'seconds': round(seconds, 3)}
+                                   for name, (count, seconds) in sorted(self.commands.items(),
+                                                                        key=lambda item: -item[1][1])},
+            'round_trips': sum(count for count, _ in self.commands.values()),
+            'counters': dict(self.counters),
+            'info': self.info
+        }
+
+    def write(self, report_file):
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def start_run():
+    """为当前线程开始一次新的统计"""
+    _local.metrics = RunMetrics()
+    return _local.metrics
+
+
+def current_metrics():
+    """当前线程的统计；没有调用过 start_run() 时自动开始"""
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is None:
+        metrics = start_run()
+    return metrics
+
+
+@contextmanager
+def span(name):
+    """统计一个阶段的用时，同名阶段的次数和用时累加"""
+    metrics = current_metrics()
+    entered_at = metrics.span_enter()
+    try:
+        yield
+    finally:
+        metrics.span_exit(name, entered_at)
+
+
+def timed(name):
+    """把函数的每次调用计入阶段 name 的装饰器（不适用于生成器函数）"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    current_metrics().counters[name] += n
+
+
+def sleep(seconds):
+    """time.sleep，同时把等待时间计入当前统计"""
+    current_metrics().sleep_seconds += seconds
+    time.sleep(seconds)
+
+
+def instrument_driver(driver):
+    """
+    统计经过 driver.execute 的每种命令的次数和用时（WebElement 上的操作也通过它发送）
+
+    记录到调用时所在线程的当前统计中，同一个 driver 可以在多次运行之间复用。
+    """
+    if getattr(driver, '_instrumented', False):
+        return driver
+    execute = driver.execute
+
+    def timed_execute(driver_command, params=None):
+        started = time.monotonic()
+        try:
+            return execute(driver_command, params)
+        finally:
+            current_metrics().record_command(driver_command, time.monotonic() - started)
+
+    driver.execute = timed_execute
+    driver._instrumented = True
+    return driver
+
+
+def run_with_profile(func, profile_file, *args, top=25, **kwargs):
+    """
+    在 cProfile 下运行 func，保存性能数据并打印累计用时最多的函数
+
+    Returns:
+        func 的返回值
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_file)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(top)
+        print(output.getvalue())
+        print(f"性能数据已保存到 {profile_file}，可用 python -m pstats {profile_file} 查看")
@@ -0,0 +1,318 @@
+"""
+按会议纪要URL缓存每条对话的内容哈希，增量重新同步已经提取过的会议
+
+飞书妙记在会后经常被修改（重命名说话人、修正文字），重新同步时：
+
+1. 打开文字记录后先只读取列表开头和末尾的段落（跳到列表末尾，不逐屏滚动），
+   与缓存中第一条、最后一条对话的哈希以及列表总高度比较，都没有变化时直接跳过这个会议
+2. 否则完整提取到临时文件，与缓存的每条对话哈希比较，得到新增、修改、重命名和删除的对话
+3. 只把变化的对话追加到 output.delta.jsonl；有变化时才替换 output.json，并更新缓存
+
+开头和末尾都没变、只修改了中间的对话时会被当作没有变化，需要时用 --full 强制完整提取。
+
+用法:
+    python meeting_cache.py URL1 URL2 ... --output-dir outputs
+    python meeting_cache.py --urls-file urls.txt --output-dir outputs --full
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from batch_extractor import output_name, read_urls
+from exporter import export, iter_records
+from instrumentation import current_metrics, default_report_file, start_run
+from selenium_extractor import (CONTENT_SPAN_SELECTOR, INSTALL_OBSERVER_JS, PARAGRAPH_CLASS, SCROLL_AND_WAIT_JS,
+                                create_driver, extract_with_driver, find_scroll_container, open_transcript_tab)
+from transcript_store import TranscriptStore, record_hash
+
+DEFAULT_CACHE_DIR = ".miaoji_cache"
+
+# 跳到列表末尾时 scrollTop 的目标值，浏览器会把它限制为实际的最大值
+SCROLL_TO_END = 1 << 30
+
+# 重新提取的对话数比上次少超过这个比例时认为提取不完整，不覆盖已有结果
+MAX_SHRINK_RATIO = 0.2
+
+
+def default_delta_file(output_file):
+    """output.json 对应的变化记录为 output.delta.jsonl"""
+    return os.path.splitext(output_file)[0] + ".delta.jsonl"
+
+
+def segment_hash(record):
+    """单条对话的内容哈希（16位十六进制），与 TranscriptStore 的滚动指纹使用同一哈希"""
+    return f"{record_hash(record['speaker'], record['time'], record['content']):016x}"
+
+
+class MeetingCache:
+    """
+    以会议URL为键的缓存目录，每个会议一个JSON文件
+
+    只保存每条对话的 (说话人, 时间, 内容哈希)，不保存内容本身；
+    另外保存第一条和最后一条对话的哈希以及虚拟列表的总高度，用于快速判断会议是否有变化。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, url):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def load(self, url):
+        """读取会议的缓存，没有缓存或缓存属于其他URL时返回 None"""
+        path = self.path_for(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"读取缓存 {path} 出错: {e}")
+            return None
+        return entry if entry.get('url') == url else None
+
+    def save(self, url, output_file, records, scroll_height=None):
+        """根据提取结果写入会议的缓存"""
+        hashes = [segment_hash(record) for record in records]
+        entry = {
+            'url': url,
+            'output_file': output_file,
+            'synced_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'count': len(records),
+            'first': hashes[0] if hashes else None,
+            'last': hashes[-1] if hashes else None,
+            'scroll_height': scroll_height,
+            'segments': [[record['speaker'], record['time'], digest] for record, digest in zip(records, hashes)]
+        }
+        path = self.path_for(url)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+        return entry
+
+
+def cached_hashes(entry):
+    """缓存中的 {(说话人, 时间): 内容哈希}"""
+    return {(speaker, timestamp): digest for speaker, timestamp, digest in entry['segments']}
+
+
+def hashes_from_output(output_file):
+    """没有缓存时以已有的输出文件为基准"""
+    return {(record['speaker'], record['time']): segment_hash(record) for record in iter_records(output_file)}
+
+
+def diff_segments(old_hashes, records):
+    """
+    比较缓存的对话哈希和新提取的对话
+
+    同一时间的一条对话被删除、另一条被新增时视为说话人重命名。
+
+    Returns:
+        list: 变化列表，每项为 {'op': 'add'|'update'|'rename'|'remove', 'speaker', 'time', ...}，
+              add/update/rename 带有新的 content，rename 带有 old_speaker
+    """
+    seen = set()
+    added = []
+    changes = []
+    for record in records:
+        key = (record['speaker'], record['time'])
+        seen.add(key)
+        digest = old_hashes.get(key)
+        if digest is None:
+            added.append(record)
+        elif digest != segment_hash(record):
+            changes.append(dict(record, op='update'))
+
+    removed_by_time = {}
+    for key in old_hashes:
+        if key not in seen:
+            removed_by_time.setdefault(key[1], []).append(key[0])
+    for record in added:
+        old_speakers = removed_by_time.get(record['time'])
+        if old_speakers:
+            changes.append(dict(record, op='rename', old_speaker=old_speakers.pop(0)))
+        else:
+            changes.append(dict(record, op='add'))
+    for timestamp, speakers in removed_by_time.items():
+        for speaker in speakers:
+            changes.append({'op': 'remove', 'speaker': speaker, 'time': timestamp})
+    return changes
+
+
+def append_delta(delta_file, changes):
+    """把一次同步中变化的对话追加到变化记录"""
+    synced_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    with open(delta_file, 'a', encoding='utf-8') as f:
+        for change in changes:
+            f.write(json.dumps(dict(change, synced_at=synced_at), ensure_ascii=False) + '\n')
+
+
+def probe_edges(driver, quiet_ms=800, timeout_ms=5000):
+    """
+    读取虚拟列表开头和末尾已渲染的段落，不逐屏滚动
+
+    先读取初始渲染的段落，再把滚动位置直接设到末尾读取最后几个段落，最后回到开头，
+    之后的完整提取仍从列表开头开始。
+
+    Returns:
+        dict: 第一条和最后一条对话的哈希以及列表总高度，无法安装观察者时返回 None
+    """
+    WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CLASS_NAME, PARAGRAPH_CLASS)))
+    target_container, scroll_element = find_scroll_container(driver)
+    try:
+        driver.execute_script(INSTALL_OBSERVER_JS, target_container or scroll_element,
+                              PARAGRAPH_CLASS, CONTENT_SPAN_SELECTOR)
+    except Exception as e:
+        print(f"安装 MutationObserver 失败: {e}")
+        return None
+    driver.set_script_timeout(timeout_ms / 1000 + 10)
+
+    store = TranscriptStore()
+    result = None
+    for scroll_to in (-1, SCROLL_TO_END, 0):
+        result = driver.execute_async_script(SCROLL_AND_WAIT_JS, {
+            'scrollTo': scroll_to, 'quietMs': quiet_ms, 'settleMs': quiet_ms,
+            'timeoutMs': timeout_ms, 'untilQuiet': True, 'finalize': []
+        })
+        if result is None:
+            return None
+        store.add_rows(list(zip(result['speakers'], result['times'], result['contents'])))
+    driver.execute_script("if (window.__miaojiObserver) { window.__miaojiObserver.disconnect(); }")
+
+    records = store.to_list()
+    return {
+        'first': segment_hash(records[0]) if records else None,
+        'last': segment_hash(records[-1]) if records else None,
+        'scroll_height': result['scrollHeight']
+    }
+
+
+def resync_meeting(driver, cache, url, output_file, full=False, source="dom", loader="observer", csv_file=None):
+    """
+    重新同步一个会议纪要
+
+    滚动没有到达列表末尾（停滞或达到最大步数），或者对话数比上次少了超过 MAX_SHRINK_RATIO 时，
+    认为这次提取不完整：不写变化记录、不覆盖 output.json，按失败处理（--full 时也一样）。
+
+    Returns:
+        dict: 同步结果，status 为 "unchanged"、"changed" 或 "new"，changes 为变化的对话数
+
+    Raises:
+        RuntimeError: 提取不完整
+    """
+    entry = cache.load(url)
+    have_output = os.path.exists(output_file)
+    if entry is not None and have_output:
+        old_hashes = cached_hashes(entry)
+    elif have_output:
+        print(f"[{url}] 没有缓存，以已有的 {output_file} 为基准")
+        old_hashes = hashes_from_output(output_file)
+    else:
+        old_hashes = None
+
+    probe = None
+    navigate = True
+    if source == "dom":
+        open_transcript_tab(driver, url)
+        navigate = False
+        probe = probe_edges(driver)
+        if (probe is not None and entry is not None and have_output and not full
+                and probe['first'] == entry['first'] and probe['last'] == entry['last']
+                and probe['scroll_height'] == entry['scroll_height']):
+            print(f"[{url}] 第一条和最后一条对话以及列表高度都没有变化，跳过")
+            return {'status': "unchanged", 'changes': 0, 'count': entry['count']}
+
+    # 提取到临时文件，确认有变化后再替换输出
+    sync_file = os.path.splitext(output_file)[0] + ".sync.json"
+    try:
+        current_metrics().info.pop('reached_end', None)
+        extract_with_driver(driver, url, sync_file, source=source, loader=loader, navigate=navigate)
+        records = list(iter_records(sync_file))
+        if current_metrics().info.get('reached_end') is False:
+            raise RuntimeError(f"没有滚动到列表末尾，只提取到 {len(records)} 条对话，保留原有结果")
+        if old_hashes and len(records) < len(old_hashes) * (1 - MAX_SHRINK_RATIO):
+            raise RuntimeError(f"只提取到 {len(records)} 条对话，比上次的 {len(old_hashes)} 条少太多，保留原有结果")
+    except Exception:
+        if os.path.exists(sync_file):
+            os.remove(sync_file)
+        raise
+
+    changes = diff_segments(old_hashes, records) if old_hashes is not None else None
+    if changes == []:
+        os.remove(sync_file)
+        status = "unchanged"
+        print(f"[{url}] 内容没有变化")
+    else:
+        if changes:
+            append_delta(default_delta_file(output_file), changes)
+            print(f"[{url}] {len(changes)} 条对话有变化，已追加到 {default_delta_file(output_file)}")
+        os.replace(sync_file, output_file)
+        if csv_file:
+            export(output_file, {'csv': csv_file})
+        status = "changed" if changes else "new"
+    cache.save(url, output_file, records, probe['scroll_height'] if probe else None)
+    return {'status': status, 'changes': len(changes) if changes else 0, 'count': len(records)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量重新同步已经提取过的飞书会议纪要")
+    parser.add_argument("urls", nargs="*", help="会议纪要URL")
+    parser.add_argument("--urls-file", help="URL列表文件，每行一个")
+    parser.add_argument("--output-dir", default="outputs", help="输出目录，默认 outputs")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"缓存目录，默认 {DEFAULT_CACHE_DIR}")
+    parser.add_argument("--full", action="store_true", help="不做快速检查，总是完整提取后比较")
+    parser.add_argument("--source", choices=["dom", "network"], default="dom", help="数据来源，同 selenium_extractor.py")
+    parser.add_argument("--loader", choices=["observer", "wheel"], default="observer", help="滚动加载方式")
+    parser.add_argument("--csv", action="store_true", help="有变化时同时更新同名的CSV文件")
+    parser.add_argument("--fast", action="store_true", help="屏蔽图片、字体和音视频，同 selenium_extractor.py")
+    parser.add_argument("--user-data-dir", metavar="DIR", help="持久化的Chrome用户数据目录（保留飞书登录状态）")
+    args = parser.parse_args()
+
+    urls = read_urls(args.urls, args.urls_file)
+    if not urls:
+        parser.error("请提供会议纪要URL或 --urls-file")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = MeetingCache(args.cache_dir)
+    results = {}
+    used_names = set()
+    driver = create_driver(args.source, fast=args.fast, user_data_dir=args.user_data_dir)
+    try:
+        for index, url in enumerate(urls):
+            name = output_name(url, index)
+            if name in used_names:
+                name = f"{os.path.splitext(name)[0]}_{index}.json"
+            used_names.add(name)
+            output_file = os.path.join(args.output_dir, name)
+            csv_file = os.path.splitext(output_file)[0] + ".csv" if args.csv else None
+            metrics = start_run()
+            try:
+                result = resync_meeting(driver, cache, url, output_file, full=args.full, source=args.source,
+                                        loader=args.loader, csv_file=csv_file)
+            except Exception as e:
+                print(f"[{url}] 同步失败: {e}")
+                result = {'status': "failed", 'error': str(e)}
+            metrics.info.update(url=url, resync=result)
+            metrics.write(default_report_file(output_file))
+            results[url] = result
+    finally:
+        driver.quit()
+
+    statuses = [result['status'] for result in results.values()]
+    print(f"同步完成: {statuses.count('unchanged')} 个没有变化，{statuses.count('changed')} 个有变化，"
+          f"{statuses.count('new')} 个新增，{statuses.count('failed')} 个失败")
+    sys.exit(0 if 'failed' not in statuses else 1)
+
+
+if __name__ == "__main__":
+    main()
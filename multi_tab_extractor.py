@@ -0,0 +1,304 @@
+"""
+在同一个无头Chrome中用多个标签页同时提取多个飞书会议纪要
+
+每个标签页的提取流程（打开URL、点击"文字记录"标签、MutationObserver 滚动加载）
+写成生成器，由 TabScheduler 协作式调度：需要等待页面时生成器交出控制权，
+调度器切换到其他标签页继续执行，而不是阻塞在 time.sleep 或页面内等待上。
+与 batch_extractor.py 每个会议占用一个浏览器相比，多个会议共享一个浏览器进程的内存。
+
+用法:
+    python multi_tab_extractor.py URL1 URL2 ... --output-dir outputs --tabs 4
+    python multi_tab_extractor.py --urls-file urls.txt --output-dir outputs
+"""
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import time
+from collections import deque
+
+from selenium import webdriver
+
+from batch_extractor import BatchJob, output_name, read_urls, write_summary
+from output_sink import ResumeCheckpoint, create_sink, restore_store
+from process_memory import PeakRssSampler
+from selenium_extractor import (PARAGRAPH_CLASS, SCROLL_AND_WAIT_JS, block_resources, create_chrome_options,
+                                observe_load_steps)
+from transcript_store import TranscriptStore
+
+# 点击"文字记录"标签，找到标签时返回 true
+CLICK_TRANSCRIPT_TAB_JS = """
+var tab = Array.from(document.querySelectorAll('div.ud__tabs__tab')).find(el => el.textContent.includes('文字记录'));
+if (!tab) {
+    return false;
+}
+tab.click();
+return true;
+"""
+
+# 在当前页面留下标记后跳转，新页面加载完成（标记消失）后才认为跳转完成
+NAVIGATE_JS = "window.__miaojiPreviousPage = true; window.location.href = arguments[0];"
+PAGE_READY_JS = "return !window.__miaojiPreviousPage && document.readyState === 'complete';"
+
+# 轮询页面状态的间隔（秒）
+POLL_INTERVAL = 0.05
+
+
+def create_multi_tab_driver(fast=False, user_data_dir=None):
+    """
+    启动用于多标签页提取的无头Chrome
+
+    后台标签页默认会被限制定时器和渲染，虚拟列表会因此加载得很慢，这里关闭这些限制；
+    页面加载策略设为 none，跳转时 chromedriver 不会阻塞等待页面加载，由标签页自己轮询加载状态。
+    fast 和 user_data_dir 参见 selenium_extractor.create_chrome_options。
+    """
+    chrome_options = create_chrome_options(fast=fast, user_data_dir=user_data_dir)
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.page_load_strategy = 'none'
+    print("正在初始化无头浏览器...")
+    driver = webdriver.Chrome(options=chrome_options)
+    if fast:
+        block_tab_resources(driver)
+    return driver
+
+
+def block_tab_resources(driver):
+    """
+    在当前标签页中屏蔽字体和音视频请求
+
+    CDP 命令只作用于当前标签页，之后新打开的每个标签页都需要再调用一次。
+    """
+    try:
+        block_resources(driver)
+    except Exception as e:
+        print(f"屏蔽图片、字体和媒体请求失败: {e}")
+
+
+class TabScheduler:
+    """
+    协作式调度多个标签页中的任务
+
+    任务是生成器，每次 yield 需要等待的秒数（0 表示只是让出执行权）；
+    调度器在等待时间到达后切换到该任务所属的标签页并继续执行它。
+    所有任务都在等待时调度器才真正 sleep，直到最早的任务可以继续。
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.switches = 0
+        self.idle_seconds = 0.0
+        self._tasks = []
+        self._seq = itertools.count()
+        self._current = None
+
+    def add(self, handle, task):
+        heapq.heappush(self._tasks, (time.monotonic(), next(self._seq), handle, task))
+
+    def run(self):
+        while self._tasks:
+            wake_at, _, handle, task = heapq.heappop(self._tasks)
+            delay = wake_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+                self.idle_seconds += delay
+            if handle != self._current:
+                self.driver.switch_to.window(handle)
+                self._current = handle
+                self.switches += 1
+            try:
+                wait = next(task)
+            except StopIteration:
+                continue
+            except Exception as e:
+                print(f"标签页任务异常退出: {e}")
+                continue
+            heapq.heappush(self._tasks, (time.monotonic() + (wait or 0), next(self._seq), handle, task))
+
+
+def wait_until(check, timeout, description, interval=POLL_INTERVAL):
+    """在生成器中轮询 check()，返回第一个为真的结果，超时抛出 RuntimeError"""
+    deadline = time.monotonic() + timeout
+    while True:
+        value = check()
+        if value:
+            return value
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"等待{description}超时")
+        yield interval
+
+
+def run_observer_steps(driver, steps, stats):
+    """
+    执行 observe_load_steps 生成器
+
+    每一步以 noWait 方式调用 SCROLL_AND_WAIT_JS：页面还没有满足等待条件时立即返回，
+    当前标签页交出控制权，之后再以 pending 方式检查同一步。
+    """
+    try:
+        options = next(steps)
+        while True:
+            stats['round_trips'] += 1
+            result = driver.execute_async_script(SCROLL_AND_WAIT_JS, dict(options, noWait=True))
+            while result is not None and result.get('pending'):
+                yield POLL_INTERVAL
+                stats['round_trips'] += 1
+                result = driver.execute_async_script(SCROLL_AND_WAIT_JS, dict(options, noWait=True, pending=True))
+            options = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+def extract_in_tab(driver, url, output_file, stats, write_mode="wal", csv_file=None, resume=False):
+    """
+    在当前标签页中提取一个会议纪要的生成器，流程与 extract_with_driver 相同
+
+    Returns:
+        int: 提取的对话数
+
+    Raises:
+        Exception: 提取失败时抛出，已提取的内容保留在预写日志和检查点中
+    """
+    checkpoint = ResumeCheckpoint(output_file, url)
+    store = TranscriptStore()
+    resuming = resume and checkpoint.load()
+    if resuming:
+        store = restore_store(output_file)
+        print(f"[{url}] 从检查点恢复: 已有 {len(store)} 条对话，滚动位置 {checkpoint.scroll_top}")
+    else:
+        checkpoint.clear()
+
+    sink = None
+    try:
+        print(f"[{url}] 正在访问")
+        opened_at = time.monotonic()
+        driver.execute_script(NAVIGATE_JS, url)
+        yield from wait_until(lambda: driver.execute_script(PAGE_READY_JS), 30, "页面加载")
+        yield from wait_until(lambda: driver.execute_script(CLICK_TRANSCRIPT_TAB_JS), 20, "文字记录标签")
+        yield from wait_until(
+            lambda: driver.execute_script("return document.getElementsByClassName(arguments[0]).length;",
+                                          PARAGRAPH_CLASS),
+            20, "会议记录内容")
+        print(f"[{url}] 从访问URL到出现第一个段落用时 {time.monotonic() - opened_at:.2f} 秒")
+
+        sink = create_sink(write_mode, output_file, csv_file, resume=resuming, store=store)
+        steps = observe_load_steps(driver, output_file, store=store, sink=sink, checkpoint=checkpoint)
+        if (yield from run_observer_steps(driver, steps, stats)) is None:
+            raise RuntimeError("无法在虚拟列表上安装 MutationObserver")
+        sink.close(store)
+        checkpoint.clear()
+        return len(store)
+    except Exception:
+        if sink is not None:
+            sink.close(store, complete=False)
+        raise
+
+
+def tab_worker(driver, queue, stats, retries=1, write_mode="wal"):
+    """一个标签页的任务：依次从共享队列中取出会议纪要提取，失败的会议放回队列末尾重试"""
+    while queue:
+        job = queue.popleft()
+        started_at = time.monotonic()
+        error = None
+        try:
+            job.count = yield from extract_in_tab(driver, job.url, job.output_file, stats, write_mode=write_mode,
+                                                  csv_file=job.csv_file, resume=job.attempts > 0)
+        except Exception as e:
+            error = e
+        job.seconds += time.monotonic() - started_at
+        job.attempts += 1
+        if error is None:
+            job.status = "ok"
+            job.error = None
+            print(f"[{job.url}] 完成: {job.count} 条对话，{job.seconds:.1f} 秒")
+        elif job.attempts <= retries:
+            job.error = str(error)
+            print(f"[{job.url}] 第 {job.attempts} 次提取失败，稍后重试: {error}")
+            queue.append(job)
+        else:
+            job.status = "failed"
+            job.error = str(error)
+            print(f"[{job.url}] 提取失败: {error}")
+
+
+def extract_in_tabs(jobs, tabs=4, retries=1, write_mode="wal", fast=False, user_data_dir=None):
+    """
+    在一个浏览器的多个标签页中提取所有会议纪要
+
+    Returns:
+        dict: 调度统计（标签页数、WebDriver往返次数、标签页切换次数、空闲等待时间）
+    """
+    queue = deque(jobs)
+    tabs = max(1, min(tabs, len(jobs)))
+    stats = {'round_trips': 0}
+    driver = create_multi_tab_driver(fast=fast, user_data_dir=user_data_dir)
+    try:
+        scheduler = TabScheduler(driver)
+        for index in range(tabs):
+            if index > 0:
+                driver.switch_to.new_window('tab')
+                if fast:
+                    block_tab_resources(driver)
+            scheduler.add(driver.current_window_handle,
+                          tab_worker(driver, queue, stats, retries=retries, write_mode=write_mode))
+        scheduler.run()
+    finally:
+        driver.quit()
+    stats.update(tabs=tabs, tab_switches=scheduler.switches, idle_seconds=round(scheduler.idle_seconds, 2))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在同一个无头Chrome的多个标签页中同时提取飞书会议纪要")
+    parser.add_argument("urls", nargs="*", help="会议纪要URL")
+    parser.add_argument("--urls-file", help="URL列表文件，每行一个")
+    parser.add_argument("--output-dir", default="outputs", help="输出目录，默认 outputs")
+    parser.add_argument("--tabs", type=int, default=4, help="同时打开的标签页数量，默认 4")
+    parser.add_argument("--retries", type=int, default=1, help="失败后重试的次数，默认 1")
+    parser.add_argument("--csv", action="store_true", help="同时写出同名的CSV文件")
+    parser.add_argument("--fast", action="store_true", help="屏蔽图片、字体和音视频，同 selenium_extractor.py")
+    parser.add_argument("--user-data-dir", metavar="DIR", help="持久化的Chrome用户数据目录（保留飞书登录状态）")
+    args = parser.parse_args()
+
+    urls = read_urls(args.urls, args.urls_file)
+    if not urls:
+        parser.error("请提供会议纪要URL或 --urls-file")
+    invalid = [url for url in urls if not (url.startswith('http://') or url.startswith('https://'))]
+    if invalid:
+        print(f"以下URL缺少http://或https://前缀: {', '.join(invalid)}")
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = []
+    used_names = set()
+    for index, url in enumerate(urls):
+        name = output_name(url, index)
+        if name in used_names:
+            name = f"{os.path.splitext(name)[0]}_{index}.json"
+        used_names.add(name)
+        output_file = os.path.join(args.output_dir, name)
+        jobs.append(BatchJob(url, output_file, output_file.replace('.json', '.csv') if args.csv else None))
+
+    print(f"共 {len(jobs)} 个会议纪要，在一个浏览器中使用 {min(args.tabs, len(jobs))} 个标签页")
+    started_at = time.monotonic()
+    with PeakRssSampler() as sampler:
+        stats = extract_in_tabs(jobs, tabs=args.tabs, retries=args.retries, fast=args.fast,
+                                user_data_dir=args.user_data_dir)
+    elapsed = time.monotonic() - started_at
+
+    summary_file = os.path.join(args.output_dir, 'batch_summary.json')
+    summary = write_summary(jobs, summary_file, elapsed, stats['tabs'], 1,
+                            extra=dict(stats, mode="multi-tab", peak_rss_mb=sampler.peak_mb))
+    print(f"完成 {summary['succeeded']}/{summary['total']} 个会议纪要，共 {summary['records']} 条对话，"
+          f"用时 {elapsed:.1f} 秒（{summary['records_per_second']} 条/秒），"
+          f"其中空闲等待 {stats['idle_seconds']:.1f} 秒")
+    if sampler.peak_mb is not None:
+        print(f"浏览器和本进程的峰值常驻内存: {sampler.peak_mb:.0f} MB")
+    print(f"汇总已保存到 {summary_file}")
+    sys.exit(0 if summary['failed'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
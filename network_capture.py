@@ -0,0 +1,170 @@
+"""
+通过 Chrome 的性能日志（CDP Network 事件）捕获页面自己请求的文字记录接口响应，
+直接从接口数据中解析说话人、时间和内容，不需要滚动虚拟列表
+"""
+import base64
+import json
+import time
+
+from instrumentation import sleep
+
+# 文字记录接口URL中包含的关键字
+TRANSCRIPT_URL_PATTERNS = ("/minutes/api/subtitles", "/minutes/api/paragraphs", "/minutes/api/transcript")
+
+
+def enable_performance_logging(chrome_options):
+    """在创建 webdriver.Chrome 之前开启性能日志，用于读取 Network 事件"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def enable_network_tracking(driver):
+    """开启 CDP Network 域，之后才能通过 Network.getResponseBody 读取响应内容"""
+    driver.execute_cdp_cmd('Network.enable', {})
+
+
+def format_milliseconds(ms):
+    """毫秒转换为 HH:MM:SS"""
+    seconds = int(ms) // 1000
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _speaker_name(paragraph):
+    speaker = paragraph.get('speaker')
+    if isinstance(speaker, dict):
+        speaker = speaker.get('user_name') or speaker.get('name') or speaker.get('speaker_name')
+    return speaker or paragraph.get('speaker_name') or paragraph.get('user_name')
+
+
+def _paragraph_time(paragraph):
+    for field in ('start_time', 'startTime', 'start_ms'):
+        value = paragraph.get(field)
+        if value is not None and str(value).isdigit():
+            return format_milliseconds(value)
+    value = paragraph.get('time')
+    return value if isinstance(value, str) else None
+
+
+def _paragraph_content(paragraph):
+    for field in ('content', 'text'):
+        value = paragraph.get(field)
+        if isinstance(value, str):
+            return value.strip()
+    parts = []
+    for sentence in paragraph.get('sentences') or []:
+        contents = sentence.get('contents') or sentence.get('words') or []
+        for item in contents:
+            text = item.get('content') or item.get('text') or ''
+            parts.append(text.strip())
+    return ''.join(parts)
+
+
+def _find_paragraph_lists(data):
+    """在接口数据中查找看起来像段落列表的字段"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in ('paragraphs', 'subtitles', 'paragraph_list') and isinstance(value, list):
+                yield value
+            else:
+                yield from _find_paragraph_lists(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _find_paragraph_lists(value)
+
+
+def parse_transcript_payload(data):
+    """
+    从文字记录接口的JSON数据中解析对话
+
+    Args:
+        data: 已解析的JSON数据
+
+    Returns:
+        tuple: ((说话人, 时间, 内容) 元组列表, 是否还有未加载的分页)
+    """
+    rows = []
+    for paragraphs in _find_paragraph_lists(data):
+        for paragraph in paragraphs:
+            if not isinstance(paragraph, dict):
+                continue
+            rows.append((_speaker_name(paragraph), _paragraph_time(paragraph), _paragraph_content(paragraph)))
+    payload = data.get('data') if isinstance(data, dict) else None
+    has_more = bool(isinstance(payload, dict) and payload.get('has_more'))
+    return rows, has_more
+
+
+class NetworkCapture:
+    """
+    从性能日志中收集文字记录接口的响应
+
+    每次 poll() 读取自上次以来的日志，找到URL匹配的响应，
+    在请求完成后通过 Network.getResponseBody 读取并解析响应内容。
+    """
+
+    def __init__(self, driver, url_patterns=TRANSCRIPT_URL_PATTERNS):
+        self.driver = driver
+        self.url_patterns = url_patterns
+        self.payloads = 0
+        self.has_more = False
+        self._matched = {}
+
+    def poll(self):
+        """
+        读取新的日志并解析已完成的文字记录响应
+
+        Returns:
+            list: 新解析出的 (说话人, 时间, 内容) 元组
+        """
+        rows = []
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                url = params.get('response', {}).get('url', '')
+                if any(pattern in url for pattern in self.url_patterns):
+                    self._matched[params['requestId']] = url
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._matched:
+                rows.extend(self._read_body(params['requestId']))
+        return rows
+
+    def _read_body(self, request_id):
+        url = self._matched.pop(request_id)
+        try:
+            response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            body = response['body']
+            if response.get('base64Encoded'):
+                body = base64.b64decode(body).decode('utf-8')
+            rows, has_more = parse_transcript_payload(json.loads(body))
+        except Exception as e:
+            print(f"读取接口响应 {url} 失败: {e}")
+            return []
+        self.payloads += 1
+        # 分页依次请求，以最后一页的 has_more 为准；前面的分页总是标记还有更多
+        self.has_more = has_more
+        print(f"捕获到文字记录接口响应: {url}，{len(rows)} 个段落")
+        return rows
+
+    def wait_for_rows(self, timeout=15, quiet=2.0, interval=0.25):
+        """
+        等待文字记录接口响应
+
+        捕获到第一批段落后，再等待 quiet 秒没有新的响应（分页接口可能连续请求多次）。
+
+        Returns:
+            list: 捕获到的所有 (说话人, 时间, 内容) 元组；没有捕获到时为空列表
+        """
+        rows = []
+        deadline = time.monotonic() + timeout
+        last_rows_at = None
+        while time.monotonic() < deadline:
+            new_rows = self.poll()
+            if new_rows:
+                rows.extend(new_rows)
+                last_rows_at = time.monotonic()
+            elif last_rows_at is not None and time.monotonic() - last_rows_at >= quiet:
+                break
+            sleep(interval)
+        return rows
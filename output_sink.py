@@ -0,0 +1,300 @@
+import csv
+import json
+import os
+import time
+
+from instrumentation import count, current_metrics, timed
+from reconcile import reconcile, summarize
+from transcript_store import TranscriptStore
+
+
+def default_log_file(output_file):
+    """output.json 对应的预写日志为 output.wal.jsonl"""
+    return os.path.splitext(output_file)[0] + ".wal.jsonl"
+
+
+def default_state_file(output_file):
+    """output.json 对应的断点续传状态文件为 output.resume.json"""
+    return os.path.splitext(output_file)[0] + ".resume.json"
+
+
+def write_json_atomic(output_file, records):
+    """
+    先写入临时文件并 fsync，再替换目标文件，中途崩溃不会留下半截的JSON
+    """
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, output_file)
+
+
+def write_csv(records, csv_file):
+    """将对话列表写入CSV文件"""
+    with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['说话人', '时间', '内容'])
+        for item in records:
+            writer.writerow([item['speaker'], item['time'], item['content']])
+
+
+def read_log(log_file):
+    """按追加顺序读取预写日志中的所有记录（包括同一对话的多个版本），忽略不完整的行"""
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"忽略日志中不完整的记录: {line[:50]!r}")
+
+
+def reconcile_records(records):
+    """运行对齐合并（参见 reconcile.py），打印并统计合并次数"""
+    records, merges = reconcile(records)
+    if merges:
+        summary = summarize(merges)
+        print(f"对齐合并: {len(merges)} 次 {summary}")
+        for action, n in summary.items():
+            count(f"reconcile_{action}", n)
+        current_metrics().info['reconcile_merges'] = merges
+    return records
+
+
+def replay_log(log_file, store=None):
+    """
+    重放预写日志，返回恢复出的 TranscriptStore
+
+    同一 (说话人, 时间) 以最长的内容为准；崩溃时写了一半的最后一行会被忽略。
+    """
+    if store is None:
+        store = TranscriptStore()
+    for record in read_log(log_file):
+        store.upsert(record['speaker'], record['time'], record['content'])
+    return store
+
+
+def restore_store(output_file, log_file=None):
+    """
+    从上次运行留下的结果恢复已提取的对话
+
+    优先重放预写日志；没有日志时读取已有的JSON输出。
+    """
+    log_file = log_file or default_log_file(output_file)
+    if os.path.exists(log_file):
+        return replay_log(log_file)
+    store = TranscriptStore()
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            for record in json.load(f):
+                store.upsert(record['speaker'], record['time'], record['content'])
+    return store
+
+
+def compact_log(log_file, output_file, csv_file=None, reconcile=False):
+    """
+    将预写日志压缩为最终的JSON（以及可选的CSV）文件
+
+    reconcile 为 True 时按日志中的捕获顺序对所有版本做一次对齐合并，而不是只保留最长的版本。
+
+    Returns:
+        int: 写入的对话数
+    """
+    if reconcile:
+        records = reconcile_records(read_log(log_file))
+    else:
+        records = replay_log(log_file).to_list()
+    write_json_atomic(output_file, records)
+    if csv_file:
+        write_csv(records, csv_file)
+    return len(records)
+
+
+class JsonRewriteSink:
+    """每次有新增或更新内容时重写整个JSON文件（原有行为）"""
+
+    # 每次都从 store 重写，对话不能移出内存
+    persists_records = False
+
+    def __init__(self, output_file, csv_file=None, reconcile=False):
+        self.output_file = output_file
+        self.csv_file = csv_file
+        self.reconcile = reconcile
+        self.rewrites = 0
+        # 对齐合并时按捕获顺序保存每个版本
+        self.captured = []
+
+    @timed("sink_write")
+    def write(self, store, changed):
+        if not changed:
+            return
+        if self.reconcile:
+            self.captured.extend(changed)
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            json.dump(store.to_list(), f, ensure_ascii=False, indent=2)
+        self.rewrites += 1
+        count("file_rewrites")
+
+    @timed("sink_close")
+    def close(self, store, complete=True):
+        records = store.to_list()
+        if self.reconcile and complete:
+            reconciled = reconcile_records(self.captured)
+            if reconciled != records:
+                write_json_atomic(self.output_file, reconciled)
+            records = reconciled
+        if self.csv_file:
+            write_csv(records, self.csv_file)
+
+
+class JsonlCheckpointSink:
+    """
+    预写日志模式：只把新增或更新的对话追加到JSONL日志，结束时一次性压缩为JSON/CSV
+
+    每批写入后都会 flush 到操作系统，进程崩溃不会丢失已追加的记录；
+    累计 fsync_every 条记录或距上次 fsync 超过 fsync_interval 秒时才 fsync 到磁盘。
+    崩溃后可用 compact_log 从日志恢复出完整的JSON文件。
+    日志保存了所有对话，因此已定稿的对话可以从 TranscriptStore 中移出。
+    """
+
+    persists_records = True
+
+    def __init__(self, output_file, csv_file=None, log_file=None, fsync_every=200, fsync_interval=2.0, resume=False,
+                 reconcile=False):
+        self.output_file = output_file
+        self.csv_file = csv_file
+        self.reconcile = reconcile
+        self.log_file = log_file or default_log_file(output_file)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.appended = 0
+        self.fsyncs = 0
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        if os.path.exists(self.log_file) and not resume:
+            # 上次运行未完成留下的日志，先移到一边，可用 compact_log 恢复；
+            # 备份名带时间戳，连续几次中断的日志都会保留，不会互相覆盖
+            backup_file = f"{self.log_file}.{time.strftime('%Y%m%d-%H%M%S')}.prev"
+            suffix = 1
+            while os.path.exists(backup_file):
+                suffix += 1
+                backup_file = f"{self.log_file}.{time.strftime('%Y%m%d-%H%M%S')}-{suffix}.prev"
+            os.replace(self.log_file, backup_file)
+            print(f"发现上次未完成的预写日志，已移动到 {backup_file}")
+        self._log = open(self.log_file, 'a', encoding='utf-8')
+
+    @timed("sink_write")
+    def write(self, store, changed):
+        if not changed:
+            return
+        count("wal_appends", len(changed))
+        self._log.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in changed))
+        self._log.flush()
+        self.appended += len(changed)
+        self._pending += len(changed)
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync()
+
+    def _fsync(self):
+        os.fsync(self._log.fileno())
+        self.fsyncs += 1
+        count("fsyncs")
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    @timed("sink_close")
+    def close(self, store, complete=True):
+        """
+        fsync 日志并写出最终的JSON/CSV
+
+        Args:
+            store: 当前的 TranscriptStore
+            complete: 提取是否正常完成；正常完成时删除日志，否则保留日志以便恢复
+        """
+        self._fsync()
+        self._log.close()
+        if self.reconcile and complete:
+            # 按捕获顺序对日志中的所有版本做一次对齐合并
+            records = reconcile_records(read_log(self.log_file))
+        elif store.finalized_count:
+            # 部分对话已移出内存，从日志重建完整结果
+            records = replay_log(self.log_file).to_list()
+        else:
+            records = store.to_list()
+        write_json_atomic(self.output_file, records)
+        if self.csv_file:
+            write_csv(records, self.csv_file)
+        print(f"预写日志共追加 {self.appended} 条记录，fsync {self.fsyncs} 次，已压缩到 {self.output_file}")
+        if complete:
+            os.remove(self.log_file)
+        else:
+            print(f"提取未完成，保留预写日志 {self.log_file}")
+
+
+class ResumeCheckpoint:
+    """
+    断点续传状态：记录URL、滚动容器的 scrollTop 和已提取的对话数
+
+    已提取对话的 (说话人, 时间) 集合不单独保存，恢复时从预写日志或JSON输出重建。
+    """
+
+    def __init__(self, output_file, url=None):
+        self.state_file = default_state_file(output_file)
+        self.url = url
+        self.scroll_top = 0
+        self.rows = 0
+
+    def load(self):
+        """
+        读取状态文件
+
+        Returns:
+            bool: 存在与当前URL对应的状态时返回 True
+        """
+        if not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"读取断点续传状态 {self.state_file} 出错: {e}")
+            return False
+        if self.url and state.get('url') != self.url:
+            print(f"断点续传状态属于其他URL: {state.get('url')}")
+            return False
+        self.scroll_top = state.get('scroll_top', 0)
+        self.rows = state.get('rows', 0)
+        return True
+
+    def save(self, scroll_top, rows):
+        self.scroll_top = scroll_top
+        self.rows = rows
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'url': self.url, 'scroll_top': scroll_top, 'rows': rows, 'updated_at': time.time()}, f)
+        os.replace(tmp_file, self.state_file)
+
+    def clear(self):
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+
+def create_sink(write_mode, output_file, csv_file=None, resume=False, store=None, reconcile=False):
+    """
+    根据写入模式创建输出
+
+    Args:
+        write_mode: "wal" 为预写日志模式，"rewrite" 为每次变化都重写JSON
+        resume: 断点续传时继续追加已有的预写日志
+        store: 断点续传时恢复出的 TranscriptStore；预写日志为空时先把其中的对话写入日志
+        reconcile: 正常结束时对提取结果做一次对齐合并（参见 reconcile.py）
+    """
+    if write_mode == "rewrite":
+        sink = JsonRewriteSink(output_file, csv_file, reconcile=reconcile)
+        if reconcile and store is not None:
+            sink.captured.extend(store.to_list())
+        return sink
+    sink = JsonlCheckpointSink(output_file, csv_file, resume=resume, reconcile=reconcile)
+    if resume and store is not None and len(store) and sink._log.tell() == 0:
+        sink.write(store, store.to_list())
+    return sink
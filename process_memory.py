@@ -0,0 +1,104 @@
+"""
+统计当前进程及其所有子进程（chromedriver 和 Chrome）占用的常驻内存
+
+通过 /proc 读取，仅支持Linux；其他系统上返回 None。
+"""
+import os
+import threading
+
+
+def _children(pid):
+    children = []
+    try:
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children', 'r') as f:
+                children.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def _rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def process_tree_rss_mb(pid=None):
+    """
+    进程树的常驻内存之和（MB）
+
+    Args:
+        pid: 根进程，默认为当前进程
+
+    Returns:
+        float: 常驻内存；无法读取 /proc 时返回 None
+    """
+    pid = pid or os.getpid()
+    if not os.path.exists(f'/proc/{pid}/status'):
+        return None
+    total_kb = 0
+    pending = [pid]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total_kb += _rss_kb(current)
+        pending.extend(_children(current))
+    return total_kb / 1024
+
+
+class PeakRssSampler:
+    """
+    在后台线程中定期采样进程树的常驻内存，记录峰值
+
+    用法:
+        with PeakRssSampler() as sampler:
+            ...
+        print(sampler.peak_mb)
+    """
+
+    def __init__(self, interval=1.0, pid=None):
+        self.interval = interval
+        self.pid = pid
+        self.peak_mb = None
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        rss = process_tree_rss_mb(self.pid)
+        if rss is not None:
+            self.samples += 1
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+        return rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+        return self.peak_mb
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,211 @@
+"""
+提取结束后对捕获到的对话做一次对齐合并
+
+虚拟列表重新渲染时，同一句话可能被拆成多条或被截断：
+- 同一 (说话人, 时间) 先后捕获到几个版本：一个是另一个的前缀（截断），或首尾重叠（分两次渲染）
+- 同一说话人的相邻两条对话首尾重叠、后一条以前一条为前缀，或后一条完全是前一条的结尾
+- 一句话的最后一两个字被单独记成一条：紧接在同一说话人没有说完的上一条对话之后，
+  或者被记到另一个说话人名下、夹在原说话人的两条对话之间（如 output.json 中 00:02:26 的 "的。"），
+  这时上一条对话结尾多出来的句号也去掉
+
+滚动过程中只需要捕获，提取结束时（压缩预写日志或写出最终JSON时）运行一次 reconcile()：
+首尾重叠用 KMP 前缀函数线性时间计算，按输入顺序确定性地合并，并返回每次合并的记录。
+
+用法:
+    python reconcile.py output.json reconciled.json --report merges.json
+    python reconcile.py output.wal.jsonl output.json
+"""
+import argparse
+import json
+import os
+from collections import Counter
+
+from exporter import iter_records
+from transcript_store import UNKNOWN_TIME_SECONDS, parse_time_to_seconds
+
+# 首尾重叠至少这么多个字符才合并，避免 "。" 之类的偶然重叠
+DEFAULT_MIN_OVERLAP = 4
+# 同一说话人的两条对话相隔不超过这么多秒才考虑合并
+DEFAULT_MAX_GAP = 60
+# 去掉结尾标点后不超过这么多个字符的对话视为被拆出的片段，0 表示不合并片段
+DEFAULT_FRAGMENT_CHARS = 2
+
+SENTENCE_END = "。."
+# 上一条对话以问号、感叹号结尾时是完整的一句话，后面的短对话不作为片段
+QUESTION_END = "？?！!"
+PUNCTUATION = "。．.，,！!？?；;、…\"'“”‘’ \t\n"
+
+
+def prefix_function(text):
+    """KMP 前缀函数：pi[i] 为 text[:i+1] 最长的相同真前缀和真后缀的长度"""
+    pi = [0] * len(text)
+    k = 0
+    for i in range(1, len(text)):
+        while k and text[i] != text[k]:
+            k = pi[k - 1]
+        if text[i] == text[k]:
+            k += 1
+        pi[i] = k
+    return pi
+
+
+def overlap_length(left, right):
+    """left 的后缀与 right 的前缀最长的重叠长度，O(len(left) + len(right))"""
+    if not left or not right:
+        return 0
+    tail = left[-len(right):]
+    # \x00 不会出现在对话内容中，保证重叠不会跨过分隔符
+    return prefix_function(right + "\x00" + tail)[-1]
+
+
+def merge_versions(current, incoming, min_overlap=DEFAULT_MIN_OVERLAP):
+    """
+    合并同一 (说话人, 时间) 的两个版本
+
+    Returns:
+        tuple: (合并后的内容, 动作)，动作为 None（没有变化）、"extended"、"overlap"、
+               "replaced"（换成了更长的新版本）或 "kept"（新版本不比原有版本长，保留原有版本）
+    """
+    if incoming in current:
+        return current, None
+    if current in incoming:
+        return incoming, "extended"
+    k = overlap_length(current, incoming)
+    if k >= min_overlap:
+        return current + incoming[k:], "overlap"
+    k = overlap_length(incoming, current)
+    if k >= min_overlap:
+        return incoming + current[k:], "overlap"
+    # 没有足够的重叠时保留较长的版本，长度相同时以最后捕获到的版本为准
+    if len(incoming) >= len(current):
+        return incoming, "replaced"
+    return current, "kept"
+
+
+def _is_fragment(content, before, fragment_chars):
+    """content 是否可能是 before 那句话被拆出来的结尾"""
+    return (0 < len(content.strip(PUNCTUATION)) <= fragment_chars
+            and not before.rstrip().endswith(tuple(QUESTION_END)))
+
+
+def reconcile(records, min_overlap=DEFAULT_MIN_OVERLAP, max_gap=DEFAULT_MAX_GAP,
+              fragment_chars=DEFAULT_FRAGMENT_CHARS):
+    """
+    合并捕获到的对话流
+
+    Args:
+        records: 按捕获顺序排列的对话（可以包含同一对话的多个版本，例如预写日志）
+        min_overlap: 首尾重叠合并的最少字符数
+        max_gap: 同一说话人的两条对话合并时允许的最大间隔（秒）
+        fragment_chars: 不超过这么多个字符（不计标点）的对话在以下情况下并入上一条对话，0 表示不合并片段：
+            上一条是同一说话人没有以句号结尾的对话；或者上一条属于另一个说话人、且下一条又回到这个说话人
+            （上一条结尾的句号去掉）。上一条以问号、感叹号结尾时不合并
+
+    Returns:
+        tuple: (按时间排序的对话列表, 合并记录列表)；
+               合并记录为 {'action', 'speaker', 'time', 'into'}，into 为合并到的对话的时间
+    """
+    merges = []
+
+    # 第一步：同一 (说话人, 时间) 的多个版本合并为一条，保持第一次出现的顺序
+    contents = {}
+    for record in records:
+        key = (record['speaker'], record['time'])
+        content = record['content']
+        if not (key[0] and key[1] and content):
+            continue
+        current = contents.get(key)
+        if current is None:
+            contents[key] = content
+            continue
+        contents[key], action = merge_versions(current, content, min_overlap)
+        if action in ("overlap", "replaced", "kept"):
+            merges.append({'action': action, 'speaker': key[0], 'time': key[1], 'into': key[1]})
+
+    # 第二步：按时间排序，同一时间保持先后顺序（与 TranscriptStore 相同）
+    rows = []
+    for order, ((speaker, timestamp), content) in enumerate(contents.items()):
+        seconds = parse_time_to_seconds(timestamp)
+        rows.append((UNKNOWN_TIME_SECONDS if seconds is None else seconds, order, speaker, timestamp, content))
+    rows.sort()
+
+    # 第三步：一次遍历合并同一说话人紧邻的重叠、前缀和片段，以及夹在另一个说话人两条对话之间的片段
+    merged = []
+    for index, (seconds, _, speaker, timestamp, content) in enumerate(rows):
+        previous = merged[-1] if merged and seconds - merged[-1]['seconds'] <= max_gap else None
+        if previous is not None and previous['speaker'] != speaker:
+            if _is_fragment(content, previous['content'], fragment_chars) and (
+                    index + 1 < len(rows) and rows[index + 1][2] == previous['speaker']):
+                # 说话人识别把原说话人一句话的结尾记到了别人名下，合并时去掉原句结尾多出来的句号
+                previous['content'] = previous['content'].rstrip().rstrip(SENTENCE_END) + content
+                merges.append({'action': "fragment", 'speaker': speaker, 'time': timestamp, 'into': previous['time']})
+                continue
+            previous = None
+        if previous is not None:
+            before = previous['content']
+            k = overlap_length(before, content)
+            action = None
+            if min_overlap <= k == len(content) < len(before):
+                # 后一条只是前一条结尾的重复渲染；完全相同的短回答（如两次 "好的。"）保留
+                action = "contained"
+            elif len(before) >= min_overlap and len(content) > len(before) and content.startswith(before):
+                previous['content'] = content
+                action = "prefix"
+            elif k >= min_overlap:
+                previous['content'] = before + content[k:]
+                action = "overlap"
+            elif (_is_fragment(content, before, fragment_chars)
+                  and not before.rstrip().endswith(tuple(SENTENCE_END))):
+                previous['content'] = before + content
+                action = "fragment"
+            if action:
+                merges.append({'action': action, 'speaker': speaker, 'time': timestamp, 'into': previous['time']})
+                continue
+
+        merged.append({'speaker': speaker, 'time': timestamp, 'content': content, 'seconds': seconds})
+
+    return [{'speaker': row['speaker'], 'time': row['time'], 'content': row['content']} for row in merged], merges
+
+
+def summarize(merges):
+    """各种合并动作的次数"""
+    return dict(Counter(merge['action'] for merge in merges))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合并被拆分、截断或重叠的对话")
+    parser.add_argument("input_file", help="output.json、预写日志或其他JSONL文件")
+    parser.add_argument("output_file", nargs="?", help="输出的JSON文件，默认覆盖输入（输入为JSONL时写到同名 .json）")
+    parser.add_argument("--report", metavar="FILE", help="把每次合并的记录保存为JSON")
+    parser.add_argument("--min-overlap", type=int, default=DEFAULT_MIN_OVERLAP,
+                        help=f"首尾重叠合并的最少字符数，默认 {DEFAULT_MIN_OVERLAP}")
+    parser.add_argument("--max-gap", type=int, default=DEFAULT_MAX_GAP,
+                        help=f"合并的两条对话之间的最大间隔（秒），默认 {DEFAULT_MAX_GAP}")
+    parser.add_argument("--fragment-chars", type=int, default=DEFAULT_FRAGMENT_CHARS,
+                        help=f"视为被拆出片段的最大字数（不计标点），0 表示不合并片段，默认 {DEFAULT_FRAGMENT_CHARS}")
+    args = parser.parse_args()
+
+    output_file = args.output_file
+    if output_file is None:
+        output_file = args.input_file
+        if args.input_file.endswith('.jsonl'):
+            output_file = args.input_file[:-len('.jsonl')]
+            if output_file.endswith('.wal'):
+                output_file = output_file[:-len('.wal')]
+            output_file += '.json'
+
+    from output_sink import write_json_atomic
+
+    records, merges = reconcile(iter_records(args.input_file), min_overlap=args.min_overlap, max_gap=args.max_gap,
+                                fragment_chars=args.fragment_chars)
+    write_json_atomic(output_file, records)
+    print(f"合并后共 {len(records)} 条对话，已保存到 {output_file}")
+    print(f"合并 {len(merges)} 次: {summarize(merges)}")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(merges, f, ensure_ascii=False, indent=2)
+        print(f"合并记录已保存到 {os.path.abspath(args.report)}")
+
+
+if __name__ == "__main__":
+    main()
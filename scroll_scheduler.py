@@ -0,0 +1,48 @@
+class ScrollScheduler:
+    """
+    根据虚拟列表的几何信息决定下一步滚动到的位置
+
+    每一步前进接近一整屏（可视高度减去 overlap_rows 行的重叠），
+    只有检测到跳过了段落时才缩小步长并从上一步的起点重新前进，
+    之后每次成功前进再逐步恢复到整屏步长。
+    """
+
+    def __init__(self, min_step=100, overlap_rows=1, min_scale=0.125):
+        self.min_step = min_step
+        self.overlap_rows = overlap_rows
+        self.min_scale = min_scale
+        self.scale = 1.0
+        self.last_step = 0
+        self._step_origin = None
+
+    def step_size(self, client_height, row_height):
+        """当前缩放比例下的步长（像素）"""
+        overlap = row_height * self.overlap_rows if row_height else 0
+        viewport_step = max(self.min_step, client_height - overlap)
+        return max(self.min_step, int(viewport_step * self.scale))
+
+    def can_shrink(self):
+        return self.scale > self.min_scale
+
+    def next_target(self, geometry, skipped=False):
+        """
+        计算下一步的目标 scrollTop
+
+        Args:
+            geometry: 页面返回的 scrollTop、scrollHeight、clientHeight、rowHeight
+            skipped: 上一步是否跳过了段落
+
+        Returns:
+            int: 目标 scrollTop
+        """
+        if skipped and self._step_origin is not None:
+            self.scale = max(self.min_scale, self.scale / 2)
+            origin = self._step_origin
+        else:
+            if not skipped:
+                self.scale = min(1.0, self.scale * 2)
+            origin = geometry['scrollTop']
+        self.last_step = self.step_size(geometry['clientHeight'], geometry.get('rowHeight'))
+        self._step_origin = origin
+        max_top = max(0, geometry['scrollHeight'] - geometry['clientHeight'])
+        return min(origin + self.last_step, max_top)
@@ -3,19 +3,365 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import json
 import time
 import os
 import sys
-import hashlib
+import argparse
+from collections import Counter
 
-def extract_transcript_with_selenium(url, output_file):
+from transcript_store import RowFinalizer, TranscriptStore
+from scroll_scheduler import ScrollScheduler
+from network_capture import NetworkCapture, enable_network_tracking, enable_performance_logging
+from exporter import export
+from instrumentation import (count, current_metrics, default_profile_file, default_report_file, instrument_driver,
+                             run_with_profile, sleep, span, start_run, timed)
+from output_sink import JsonRewriteSink, ResumeCheckpoint, compact_log, create_sink, restore_store
+
+# 段落选择器
+PARAGRAPH_CLASS = "paragraph-editor-wrapper"
+CONTENT_SPAN_SELECTOR = "span[data-string='true'][data-leaf='true']"
+
+# 快速模式下屏蔽的资源（头像等图片、字体、音视频），提取文字记录用不到它们
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m4a", "*.mp3", "*.aac", "*.m3u8"
+]
+
+# 读取单个段落的 [说话人, 时间] 或 [说话人, 时间, 内容]，供各页面脚本复用
+# 缺少说话人节点时与逐元素路径一致，记为"未知说话人"；缺少时间节点时记为空字符串
+# 段落键为 说话人 + "\u0001" + 时间，与 RowFinalizer.page_key 一致；
+# window.__miaojiFinalized 保存已定稿的段落键，定稿段落只读取键、不再读取内容
+READ_PARAGRAPH_JS = """
+var finalized = window.__miaojiFinalized = window.__miaojiFinalized || new Set();
+function readHeader(p) {
+    var nameEl = p.querySelector('div.p-user-name');
+    var timeEl = p.querySelector('div.p-time');
+    return [
+        nameEl ? nameEl.getAttribute('user-name-content') : '未知说话人',
+        timeEl ? timeEl.getAttribute('time-content') : ''
+    ];
+}
+function paragraphKey(header) {
+    return header[0] + '\u0001' + header[1];
+}
+function readParagraph(p, spanSelector, header) {
+    header = header || readHeader(p);
+    var spans = p.querySelectorAll(spanSelector);
+    var text = '';
+    for (var j = 0; j < spans.length; j++) {
+        if (spans[j].getAttribute('data-enter') !== 'true') {
+            text += (spans[j].innerText || '').trim();
+        }
+    }
+    return [header[0], header[1], text];
+}
+"""
+
+# 一次 execute_script 读取所有已渲染且未定稿的段落，arguments[2] 为新定稿的段落键
+# 返回 [说话人列表, 时间列表, 内容列表, 所有已渲染段落的键]
+EXTRACT_PARAGRAPHS_JS = READ_PARAGRAPH_JS + """
+var newlyFinalized = arguments[2] || [];
+for (var k = 0; k < newlyFinalized.length; k++) {
+    finalized.add(newlyFinalized[k]);
+}
+var paragraphs = document.getElementsByClassName(arguments[0]);
+var speakers = [], times = [], contents = [], keys = [];
+for (var i = 0; i < paragraphs.length; i++) {
+    var header = readHeader(paragraphs[i]);
+    var key = paragraphKey(header);
+    keys.push(key);
+    if (finalized.has(key)) {
+        continue;
+    }
+    var row = readParagraph(paragraphs[i], arguments[1], header);
+    speakers.push(row[0]);
+    times.push(row[1]);
+    contents.push(row[2]);
+}
+return [speakers, times, contents, keys];
+"""
+
+# 在虚拟列表上安装 MutationObserver，把新渲染或内容变化的段落缓存在页面中
+# 缓存以 说话人+时间 为键，同一段落保留最长的内容；arguments[3] 为 true 时不比较长度，
+# 同一段落内容每次变化都另存一个版本（交给提取结束后的对齐合并）；安装时先缓存当前已渲染的段落
+INSTALL_OBSERVER_JS = READ_PARAGRAPH_JS + """
+var el = arguments[0], paragraphClass = arguments[1], spanSelector = arguments[2], keepAll = !!arguments[3];
+var holder = el.classList && el.classList.contains('rc-virtual-list')
+    ? (el.querySelector('.rc-virtual-list-holder') || el) : el;
+if (window.__miaojiObserver) {
+    window.__miaojiObserver.disconnect();
+}
+var state = {
+    holder: holder, paragraphClass: paragraphClass, finalized: finalized,
+    readHeader: readHeader, paragraphKey: paragraphKey,
+    rows: {}, order: [], lastMutation: Date.now(), mutations: 0
+};
+window.__miaojiState = state;
+function capture(p) {
+    var header = readHeader(p);
+    var key = paragraphKey(header);
+    if (finalized.has(key)) {
+        return;
+    }
+    var row = readParagraph(p, spanSelector, header);
+    if (!row[0] || !row[1] || !row[2]) {
+        return;
+    }
+    var prev = state.rows[key];
+    if (prev === undefined || (keepAll && row[2] !== prev[2])) {
+        state.order.push(row);
+        state.rows[key] = row;
+    } else if (!keepAll && row[2].length > prev[2].length) {
+        prev[2] = row[2];
+    }
+}
+function collect(node, touched) {
+    var target = node.nodeType === 1 ? node : node.parentElement;
+    if (!target) {
+        return;
+    }
+    var p = target.closest('.' + paragraphClass);
+    if (p) {
+        touched.add(p);
+        return;
+    }
+    var inner = target.getElementsByClassName(paragraphClass);
+    for (var k = 0; k < inner.length; k++) {
+        touched.add(inner[k]);
+    }
+}
+var observer = new MutationObserver(function (mutations) {
+    state.lastMutation = Date.now();
+    state.mutations += mutations.length;
+    var touched = new Set();
+    for (var i = 0; i < mutations.length; i++) {
+        var m = mutations[i];
+        if (m.type === 'childList') {
+            for (var j = 0; j < m.addedNodes.length; j++) {
+                collect(m.addedNodes[j], touched);
+            }
+        } else {
+            collect(m.target, touched);
+        }
+    }
+    touched.forEach(capture);
+});
+observer.observe(holder, {
+    childList: true, subtree: true, characterData: true,
+    attributes: true, attributeFilter: ['user-name-content', 'time-content']
+});
+window.__miaojiObserver = observer;
+var initial = holder.getElementsByClassName(paragraphClass);
+for (var i = 0; i < initial.length; i++) {
+    capture(initial[i]);
+}
+return initial.length;
+"""
+
+# 滚动一步后在页面内等待，直到有新段落且 settleMs 内没有新的变化，或者 quietMs 内完全没有变化
+# options: scrollTo 目标 scrollTop（-1 表示不滚动；直接设置不生效时改为派发滚轮事件），
+#          quietMs/settleMs/timeoutMs 等待时间，untilQuiet 为 true 时忽略新段落、一直等到安静
+#          noWait 为 true 时不在页面内等待：条件未满足时立即返回 {pending: true}，
+#          之后以 pending 为 true 再次调用继续检查同一步（多个标签页轮流等待时使用）
+# 返回缓存的段落并清空缓存，同时返回滚动位置、是否已到达列表末尾、
+# 已渲染段落的平均高度、已渲染段落的键以及可视区域内第一个和最后一个段落的键
+SCROLL_AND_WAIT_JS = """
+var options = arguments[0];
+var done = arguments[arguments.length - 1];
+var state = window.__miaojiState;
+if (!state) {
+    done(null);
+    return;
+}
+var holder = state.holder;
+var start;
+if (options.pending && state.stepStart) {
+    start = state.stepStart;
+} else {
+    start = state.stepStart = Date.now();
+    var before = holder.scrollTop;
+    for (var k = 0; k < options.finalize.length; k++) {
+        state.finalized.add(options.finalize[k]);
+    }
+    if (options.scrollTo >= 0 && options.scrollTo !== before) {
+        holder.scrollTop = options.scrollTo;
+        if (holder.scrollTop === before) {
+            // 列表不允许直接设置 scrollTop 时派发滚轮事件
+            holder.dispatchEvent(new WheelEvent('wheel', {
+                deltaY: options.scrollTo - before, deltaMode: 0, bubbles: true, cancelable: true
+            }));
+        }
+    }
+}
+function geometry() {
+    var holderRect = holder.getBoundingClientRect();
+    var paragraphs = holder.getElementsByClassName(state.paragraphClass);
+    var keys = [], totalHeight = 0, firstVisible = null, lastVisible = null;
+    for (var i = 0; i < paragraphs.length; i++) {
+        var p = paragraphs[i];
+        var key = state.paragraphKey(state.readHeader(p));
+        var rect = p.getBoundingClientRect();
+        keys.push(key);
+        totalHeight += rect.height;
+        if (rect.bottom > holderRect.top && rect.top < holderRect.bottom) {
+            if (firstVisible === null) {
+                firstVisible = key;
+            }
+            lastVisible = key;
+        }
+    }
+    return {
+        renderedKeys: keys, firstVisible: firstVisible, lastVisible: lastVisible,
+        rowHeight: paragraphs.length ? totalHeight / paragraphs.length : 0
+    };
+}
+function finish(quiet) {
+    var speakers = [], times = [], contents = [];
+    for (var i = 0; i < state.order.length; i++) {
+        var row = state.order[i];
+        speakers.push(row[0]);
+        times.push(row[1]);
+        contents.push(row[2]);
+    }
+    state.rows = {};
+    state.order = [];
+    var result = geometry();
+    result.speakers = speakers;
+    result.times = times;
+    result.contents = contents;
+    result.quiet = quiet;
+    result.atEnd = holder.scrollTop + holder.clientHeight >= holder.scrollHeight - 2;
+    result.scrollTop = holder.scrollTop;
+    result.scrollHeight = holder.scrollHeight;
+    result.clientHeight = holder.clientHeight;
+    result.mutations = state.mutations;
+    done(result);
+}
+(function poll() {
+    var now = Date.now();
+    var idle = now - Math.max(state.lastMutation, start);
+    if (idle >= options.quietMs) {
+        finish(true);
+    } else if (!options.untilQuiet && state.order.length > 0 && idle >= options.settleMs) {
+        finish(false);
+    } else if (now - start >= options.timeoutMs) {
+        finish(false);
+    } else if (options.noWait) {
+        done({pending: true});
+    } else {
+        setTimeout(poll, 16);
+    }
+})();
+"""
+
+
+class ParagraphReader:
     """
-    使用Selenium打开URL，点击文字记录标签，然后提取会议记录
-    
+    读取当前已渲染的段落，返回 (说话人, 时间, 内容) 元组列表
+
+    engine 为 "js" 时每次读取只发起一次 execute_script 往返，并且只读取未定稿段落的内容
+    （定稿的段落由 finalizer 通知页面）；脚本执行失败或返回格式异常时自动回退到逐元素读取（engine="dom"）。
+    两条路径各自的 WebDriver 往返次数记录在 round_trips 中。
+    """
+
+    def __init__(self, driver, engine="js", finalizer=None):
+        self.driver = driver
+        self.engine = engine
+        self.finalizer = finalizer
+        self.round_trips = Counter()
+        # 最近一次读取时已渲染的段落数和段落键（逐元素读取时键为 None）
+        self.rendered_count = 0
+        self.rendered_keys = None
+
+    def count(self):
+        """返回当前已渲染的段落数"""
+        self.round_trips[self.engine] += 1
+        if self.engine == "js":
+            return self.driver.execute_script(
+                "return document.getElementsByClassName(arguments[0]).length;", PARAGRAPH_CLASS)
+        return len(self.driver.find_elements(By.CLASS_NAME, PARAGRAPH_CLASS))
+
+    @timed("extract")
+    def read(self):
+        """读取所有已渲染（js方式下为已渲染且未定稿）的段落"""
+        count("sweeps")
+        if self.engine == "js":
+            rows = self._read_js()
+            if rows is not None:
+                return rows
+            print("JavaScript批量提取失败，回退到逐元素提取")
+            self.engine = "dom"
+        return self._read_dom()
+
+    def _read_js(self):
+        self.round_trips["js"] += 1
+        newly_finalized = self.finalizer.take_outbox() if self.finalizer else []
+        try:
+            result = self.driver.execute_script(EXTRACT_PARAGRAPHS_JS, PARAGRAPH_CLASS, CONTENT_SPAN_SELECTOR,
+                                                newly_finalized)
+            speakers, times, contents, keys = result
+        except Exception as e:
+            print(f"执行批量提取脚本出错: {e}")
+            return None
+        self.rendered_count = len(keys)
+        self.rendered_keys = keys
+        return list(zip(speakers, times, contents))
+
+    def _read_dom(self):
+        paragraphs = self.driver.find_elements(By.CLASS_NAME, PARAGRAPH_CLASS)
+        self.round_trips["dom"] += 1
+        self.rendered_count = len(paragraphs)
+        self.rendered_keys = None
+        rows = []
+        for paragraph in paragraphs:
+            # 提取说话人
+            try:
+                self.round_trips["dom"] += 2
+                speaker_element = paragraph.find_element(By.CSS_SELECTOR, "div.p-user-name")
+                speaker = speaker_element.get_attribute("user-name-content")
+            except:
+                speaker = "未知说话人"
+
+            # 提取时间
+            try:
+                self.round_trips["dom"] += 2
+                time_element = paragraph.find_element(By.CSS_SELECTOR, "div.p-time")
+                timestamp = time_element.get_attribute("time-content")
+            except:
+                timestamp = ""
+
+            # 提取内容
+            content = ""
+            try:
+                self.round_trips["dom"] += 1
+                content_spans = paragraph.find_elements(By.CSS_SELECTOR, CONTENT_SPAN_SELECTOR)
+                for span in content_spans:
+                    # 排除换行符
+                    self.round_trips["dom"] += 1
+                    if span.get_attribute("data-enter") != "true":
+                        self.round_trips["dom"] += 1
+                        content += span.text
+            except:
+                content = ""
+
+            rows.append((speaker, timestamp, content))
+        return rows
+
+    def report(self):
+        """打印两条路径的往返次数"""
+        print(f"WebDriver往返次数: JavaScript批量提取 {self.round_trips['js']} 次, "
+              f"逐元素提取 {self.round_trips['dom']} 次")
+
+
+def create_chrome_options(source="dom", fast=False, user_data_dir=None):
+    """
+    创建无头Chrome的启动选项
+
     Args:
-        url: 会议纪要URL
-        output_file: 输出文件路径
+        source: 数据来源，"network" 时开启性能日志用于捕获接口响应
+        fast: 快速模式，不加载图片和自动播放媒体，DOM就绪（eager）即返回，不等待所有资源加载完成
+        user_data_dir: 持久化的Chrome用户数据目录，可以复用其中的飞书登录状态
     """
     # 设置Chrome选项
     chrome_options = Options()
@@ -37,54 +383,209 @@ def extract_transcript_with_selenium(url, output_file):
     # 如果还有问题，可以尝试完全禁用SSL验证(仅用于测试)
     chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
     
-    # 初始化WebDriver
-    print("正在初始化无头浏览器...")
-    driver = webdriver.Chrome(options=chrome_options)
+    # 捕获接口响应需要性能日志
+    if source == "network":
+        enable_performance_logging(chrome_options)
     
-    try:
-        # 访问URL
-        print(f"正在访问: {url}")
+    if fast:
+        chrome_options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2
+        })
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.page_load_strategy = 'eager'
+    
+    if user_data_dir:
+        chrome_options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+    return chrome_options
+
+def block_resources(driver, patterns=BLOCKED_RESOURCE_PATTERNS):
+    """通过CDP屏蔽匹配的请求（字体、音视频等无法通过 prefs 关闭的资源）"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+def create_driver(source="dom", fast=False, user_data_dir=None):
+    """
+    启动无头Chrome，同一个 driver 可以依次用于多次提取
+
+    参数参见 create_chrome_options；快速模式下还会通过CDP屏蔽字体和音视频请求。
+    """
+    print("正在初始化无头浏览器...")
+    with span("driver_start"):
+        driver = webdriver.Chrome(options=create_chrome_options(source, fast=fast, user_data_dir=user_data_dir))
+    instrument_driver(driver)
+    if source == "network":
+        enable_network_tracking(driver)
+    if fast:
+        try:
+            block_resources(driver)
+        except Exception as e:
+            print(f"屏蔽图片、字体和媒体请求失败: {e}")
+    return driver
+
+def wait_for_page_ready(driver, timeout=30):
+    """等待文档解析完成（readyState 不再是 loading），代替固定的 sleep"""
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") != "loading"
+    )
+
+def open_transcript_tab(driver, url):
+    """访问会议纪要URL并点击"文字记录"标签"""
+    # 访问URL
+    print(f"正在访问: {url}")
+    with span("page_load"):
         driver.get(url)
         
         # 等待页面加载
         print("等待页面加载...")
-        time.sleep(5)
-        
-        # 查找并点击"文字记录"标签
-        print("尝试点击文字记录标签...")
+        wait_for_page_ready(driver)
+    
+    with span("tab_click"):
+        click_transcript_tab(driver)
+
+def click_transcript_tab(driver):
+    """点击"文字记录"标签，失败时改用JavaScript点击"""
+    # 查找并点击"文字记录"标签
+    print("尝试点击文字记录标签...")
+    try:
+        # 等待元素可点击
+        text_record_tab = WebDriverWait(driver, 20).until(
+            EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'ud__tabs__tab') and contains(text(), '文字记录')]"))
+        )
+        # 点击元素
+        text_record_tab.click()
+        print("已点击文字记录标签")
+    except Exception as e:
+        print(f"点击文字记录标签时出错: {e}")
+        # 尝试使用JavaScript点击
         try:
-            # 等待元素可点击
-            text_record_tab = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(@class, 'ud__tabs__tab') and contains(text(), '文字记录')]"))
-            )
-            # 点击元素
-            text_record_tab.click()
-            print("已点击文字记录标签")
-            # 等待内容加载
-            time.sleep(2)
-        except Exception as e:
-            print(f"点击文字记录标签时出错: {e}")
-            # 尝试使用JavaScript点击
-            try:
-                driver.execute_script("Array.from(document.querySelectorAll('div.ud__tabs__tab')).find(el => el.textContent.includes('文字记录')).click();")
-                print("已使用JavaScript点击文字记录标签")
-                time.sleep(2)
-            except Exception as js_error:
-                print(f"使用JavaScript点击失败: {js_error}")
-                print("继续尝试提取内容...")
+            driver.execute_script("Array.from(document.querySelectorAll('div.ud__tabs__tab')).find(el => el.textContent.includes('文字记录')).click();")
+            print("已使用JavaScript点击文字记录标签")
+        except Exception as js_error:
+            print(f"使用JavaScript点击失败: {js_error}")
+            print("继续尝试提取内容...")
+
+def extract_with_driver(driver, url, output_file, engine="js", write_mode="wal", csv_file=None, resume=False,
+                        loader="observer", source="dom", navigate=True, reconcile=False):
+    """
+    使用已启动的 driver 提取一个会议纪要，结束后不关闭浏览器
+
+    参数含义与 extract_transcript_with_selenium 相同；source 为 "network" 时
+    driver 需由 create_driver(source="network") 创建。
+    navigate 为 False 时不重新打开URL，直接从当前已显示文字记录的页面开始提取。
+    reconcile 为 True 时正常结束后对提取结果做一次对齐合并（参见 reconcile.py）。
+
+    Returns:
+        int: 提取的对话数
+
+    Raises:
+        Exception: 提取失败时抛出，已提取的内容保留在预写日志和检查点中，可用 resume=True 继续
+    """
+    # 断点续传：恢复已提取的对话和滚动位置
+    checkpoint = ResumeCheckpoint(output_file, url)
+    store = TranscriptStore()
+    resuming = resume and checkpoint.load()
+    if resuming:
+        store = restore_store(output_file)
+        print(f"从检查点恢复: 已有 {len(store)} 条对话，滚动位置 {checkpoint.scroll_top}")
+    elif resume:
+        print("未找到可用的检查点，从头开始提取")
+    else:
+        checkpoint.clear()
+    # 对齐合并时滚动过程中不比较长度，捕获到的每个版本都交给输出
+    store.keep_longest = not reconcile
+    
+    sink = None
+    try:
+        if source == "network":
+            # 丢弃上一次提取留下的性能日志，避免读到上一个会议的接口响应
+            driver.get_log('performance')
+        
+        opened_at = time.monotonic()
+        if navigate:
+            open_transcript_tab(driver, url)
+        
+        sink = create_sink(write_mode, output_file, csv_file, resume=resuming, store=store, reconcile=reconcile)
+        
+        # 直接从文字记录接口的响应中提取
+        if source == "network" and load_from_network(driver, store, sink):
+            print(f"从访问URL到取得接口数据用时 {time.monotonic() - opened_at:.2f} 秒")
+            current_metrics().info.update(loader="network", rows=len(store))
+            sink.close(store)
+            checkpoint.clear()
+            print(f"已成功从接口响应提取会议记录并保存到 {output_file}")
+            print(f"共提取了 {len(store)} 条对话")
+            return len(store)
         
         # 等待会议记录内容加载
         print("等待会议记录内容加载...")
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "paragraph-editor-wrapper"))
-        )
+        with span("first_paragraph_wait"):
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "paragraph-editor-wrapper"))
+            )
+        first_paragraph_seconds = time.monotonic() - opened_at
+        current_metrics().info['first_paragraph_seconds'] = round(first_paragraph_seconds, 3)
+        print(f"从访问URL到出现第一个段落用时 {first_paragraph_seconds:.2f} 秒")
         
         # 向下滚动加载所有内容
         print("开始滚动加载所有会议记录内容...")
-        transcript = scroll_and_load_all_content(driver, output_file)
+        transcript = None
+        with span("scroll"):
+            if loader == "observer":
+                transcript = observe_and_load_all_content(driver, output_file, store=store, sink=sink,
+                                                          checkpoint=checkpoint)
+                if transcript is None:
+                    print("回退到滚轮滚动加载...")
+                    loader = "wheel"
+            if transcript is None:
+                transcript = scroll_and_load_all_content(driver, output_file, engine=engine, store=store, sink=sink,
+                                                         checkpoint=checkpoint)
+        current_metrics().info.update(loader=loader, rows=len(store))
+        sink.close(store)
+        checkpoint.clear()
         
         print(f"已成功提取会议记录并保存到 {output_file}")
-        print(f"共提取了 {len(transcript)} 条对话")
+        print(f"共提取了 {len(store)} 条对话")
+        return len(store)
+    
+    except Exception:
+        if sink is not None:
+            # 保存已提取的内容，预写日志保留以便恢复
+            sink.close(store, complete=False)
+            print(f"可以使用 --resume 从中断位置继续提取（滚动位置 {checkpoint.scroll_top}）")
+        raise
+
+def extract_transcript_with_selenium(url, output_file, engine="js", write_mode="wal", csv_file=None, resume=False,
+                                     loader="observer", source="dom", fast=False, user_data_dir=None,
+                                     reconcile=False):
+    """
+    使用Selenium打开URL，点击文字记录标签，然后提取会议记录
+
+    Args:
+        url: 会议纪要URL
+        output_file: 输出文件路径
+        engine: 段落提取方式，"js"为单次脚本批量提取，"dom"为逐元素提取
+        write_mode: 保存方式，"wal"为追加预写日志并在结束时压缩，"rewrite"为每次变化都重写JSON
+        csv_file: 结束时同时写出的CSV文件路径，None表示不写
+        resume: 从上次中断时记录的滚动位置和已提取内容继续
+        loader: 加载方式，"observer"为 MutationObserver 事件驱动加载，"wheel"为滚轮事件加固定等待
+        source: 数据来源，"dom"为滚动页面提取，"network"为捕获页面请求的文字记录接口响应，
+            未捕获到接口响应时回退到滚动页面提取
+        fast: 快速模式，屏蔽图片、字体和音视频并使用 eager 页面加载策略
+        user_data_dir: 持久化的Chrome用户数据目录，None 时每次使用临时目录
+        reconcile: 结束时合并被拆分、截断或重叠的对话（参见 reconcile.py）
+    """
+    metrics = start_run()
+    metrics.info.update(url=url, output_file=output_file, engine=engine, write_mode=write_mode, source=source,
+                        fast=fast)
+    
+    # 初始化WebDriver
+    driver = create_driver(source, fast=fast, user_data_dir=user_data_dir)
+    
+    try:
+        extract_with_driver(driver, url, output_file, engine=engine, write_mode=write_mode, csv_file=csv_file,
+                            resume=resume, loader=loader, source=source, reconcile=reconcile)
         return True
     
     except Exception as e:
@@ -94,151 +595,57 @@ def extract_transcript_with_selenium(url, output_file):
         return False
     finally:
         # 截图保存，便于调试
-        try:
-            screenshot_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'screenshot.png')
-            driver.save_screenshot(screenshot_path)
-            print(f"已保存页面截图到 {screenshot_path}")
-        except:
-            pass
+        with span("screenshot"):
+            try:
+                screenshot_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'screenshot.png')
+                driver.save_screenshot(screenshot_path)
+                print(f"已保存页面截图到 {screenshot_path}")
+            except:
+                pass
             
         # 在无头模式下不需要等待用户确认
         print("处理完成，自动关闭浏览器...")
-        driver.quit()
+        with span("driver_quit"):
+            driver.quit()
+        
+        # 写出运行报告
+        report_file = default_report_file(output_file)
+        metrics.write(report_file)
+        print(f"运行报告已保存到 {report_file}")
 
-def scroll_and_load_all_content(driver, output_file):
+@timed("network_capture")
+def load_from_network(driver, store, sink, timeout=15):
     """
-    滚动页面直到所有内容都被加载，并在每次发现新内容时保存
-    
-    Args:
-        driver: Selenium WebDriver对象
-        output_file: 输出文件路径
-        
+    捕获页面请求的文字记录接口响应并保存其中的对话
+
     Returns:
-        list: 完整的会议记录列表
+        bool: 接口数据完整时返回 True；没有捕获到响应或接口还有未加载的分页时返回 False，
+            由调用方继续滚动页面补全（已捕获的对话会在滚动时去重）
+    """
+    print("等待文字记录接口响应...")
+    capture = NetworkCapture(driver)
+    rows = capture.wait_for_rows(timeout=timeout)
+    if not rows:
+        print("未捕获到文字记录接口响应，回退到滚动页面提取")
+        return False
+    new_items_count, updated_items_count, changed = store.add_rows(rows)
+    count("rows_new", new_items_count)
+    count("rows_updated", updated_items_count)
+    print(f"接口响应中发现 {new_items_count} 条新对话，更新 {updated_items_count} 条已存在的对话")
+    sink.write(store, changed)
+    if capture.has_more:
+        print("接口数据还有未加载的分页，继续滚动页面补全")
+        return False
+    return True
+
+@timed("container_discovery")
+def find_scroll_container(driver):
+    """
+    定位文字记录的虚拟列表容器和可滚动容器
+
+    Returns:
+        tuple: (可见的虚拟列表容器元素，未找到时为 None, 可滚动容器元素)
     """
-    print("开始加载内容...")
-    
-    # 等待初始内容完全加载
-    print("等待初始内容加载...")
-    time.sleep(5)  # 增加初始等待时间
-    
-    # 初始化存储结构
-    saved_transcript = []
-    processed_texts = set()
-    
-    def extract_and_save_content(paragraphs, current_content=None):
-        """
-        从段落中提取内容并保存
-        返回新增内容数量
-        """
-        if current_content is None:
-            current_content = []
-            
-        new_items_count = 0
-        updated_items_count = 0
-        content_updated = False
-        
-        # 使用字典来临时存储最新的内容
-        latest_content = {}
-        
-        for paragraph in paragraphs:
-            # 提取说话人
-            try:
-                speaker_element = paragraph.find_element(By.CSS_SELECTOR, "div.p-user-name")
-                speaker = speaker_element.get_attribute("user-name-content")
-            except:
-                speaker = "未知说话人"
-            
-            # 提取时间
-            try:
-                time_element = paragraph.find_element(By.CSS_SELECTOR, "div.p-time")
-                timestamp = time_element.get_attribute("time-content")
-            except:
-                timestamp = ""
-            
-            # 提取内容
-            content = ""
-            try:
-                content_spans = paragraph.find_elements(By.CSS_SELECTOR, "span[data-string='true'][data-leaf='true']")
-                for span in content_spans:
-                    # 排除换行符
-                    if span.get_attribute("data-enter") != "true":
-                        content += span.text
-            except:
-                content = ""
-            
-            # 只处理有说话人、时间和内容的段落
-            if speaker and timestamp and content:
-                # 使用说话人和时间作为唯一标识
-                dialog_key = f"{speaker}_{timestamp}"
-                
-                # 将当前内容添加到latest_content字典
-                if dialog_key in latest_content:
-                    # 如果新内容比已存储的长，更新它
-                    if len(content) > len(latest_content[dialog_key]['content']):
-                        latest_content[dialog_key] = {
-                            'speaker': speaker,
-                            'time': timestamp,
-                            'content': content
-                        }
-                        content_updated = True
-                else:
-                    latest_content[dialog_key] = {
-                        'speaker': speaker,
-                        'time': timestamp,
-                        'content': content
-                    }
-        
-        # 更新saved_transcript
-        for dialog_key, dialog_data in latest_content.items():
-            # 检查是否已存在这段对话
-            existing_dialog = None
-            for i, item in enumerate(saved_transcript):
-                if item['speaker'] == dialog_data['speaker'] and item['time'] == dialog_data['time']:
-                    existing_dialog = item
-                    existing_index = i
-                    break
-            
-            if existing_dialog:
-                # 如果新内容比现有内容长，更新它
-                if len(dialog_data['content']) > len(existing_dialog['content']):
-                    saved_transcript[existing_index] = dialog_data
-                    updated_items_count += 1
-                    content_updated = True
-            else:
-                # 这是一段新对话
-                saved_transcript.append(dialog_data)
-                new_items_count += 1
-                current_content.append(dialog_key)
-        
-        # 如果有新增或更新的内容，保存到文件
-        if new_items_count > 0 or updated_items_count > 0:
-            print(f"发现 {new_items_count} 条新对话，更新 {updated_items_count} 条已存在的对话")
-            # 按时间排序
-            saved_transcript.sort(key=lambda x: x['time'])
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(saved_transcript, f, ensure_ascii=False, indent=2)
-        
-        return new_items_count + (1 if content_updated else 0), current_content
-    
-    # 获取初始内容
-    print("读取初始内容...")
-    initial_paragraphs = driver.find_elements(By.CLASS_NAME, "paragraph-editor-wrapper")
-    initial_count = len(initial_paragraphs)
-    print(f"初始段落数: {initial_count}")
-    
-    # 先处理初始内容
-    initial_new_items, current_content = extract_and_save_content(initial_paragraphs)
-    print(f"初始内容中发现 {initial_new_items} 条对话")
-    
-    # 初始化滚动相关变量
-    prev_count = initial_count
-    current_count = initial_count
-    no_change_count = 0
-    max_no_change = 5
-    scroll_attempts = 0
-    last_content_hash = hashlib.md5(str(current_content).encode()).hexdigest()
-    
     # 尝试多种可能的滚动容器
     scroll_containers = [
         # 1. 文字记录区域的主内容容器
@@ -294,6 +701,115 @@ def scroll_and_load_all_content(driver, output_file):
         print("未找到可滚动容器，将尝试滚动整个页面")
         container_js = "document.scrollingElement || document.documentElement"
     
+    return target_container, driver.execute_script(f"return {container_js}")
+
+def jump_to_scroll_offset(driver, element, offset, max_attempts=10):
+    """
+    将滚动容器直接设置到指定的 scrollTop
+
+    虚拟列表的总高度可能随着渲染逐步增加，一次设置不到位时重复设置，
+    直到到达目标位置或位置不再变化。
+
+    Returns:
+        int: 实际到达的 scrollTop
+    """
+    reached = 0
+    for _ in range(max_attempts):
+        position = driver.execute_script(
+            "arguments[0].scrollTop = arguments[1]; return arguments[0].scrollTop;", element, offset)
+        sleep(0.5)
+        if position >= offset - 1 or position <= reached:
+            return position
+        reached = position
+    return reached
+
+def scroll_and_load_all_content(driver, output_file, engine="js", store=None, sink=None, checkpoint=None):
+    """
+    滚动页面直到所有内容都被加载，并在每次发现新内容时保存
+    
+    Args:
+        driver: Selenium WebDriver对象
+        output_file: 输出文件路径
+        engine: 段落提取方式，参见 ParagraphReader
+        store: 保存对话的 TranscriptStore，None 时新建
+        sink: 输出，None 时每次变化都重写 output_file 并在结束时关闭；
+            由调用方传入时需由调用方关闭
+        checkpoint: ResumeCheckpoint，每次保存新内容时记录滚动位置；
+            其中已有滚动位置时先跳转到该位置再继续滚动
+        
+    Returns:
+        TranscriptStore: 保存了所有对话的 store；输出会保存对话时，已定稿的对话已移出内存
+    """
+    print("开始加载内容...")
+    
+    # 等待初始内容完全加载
+    print("等待初始内容加载...")
+    sleep(5)  # 增加初始等待时间
+    
+    # 初始化存储结构
+    if store is None:
+        store = TranscriptStore()
+    owns_sink = sink is None
+    if owns_sink:
+        sink = JsonRewriteSink(output_file)
+    finalizer = RowFinalizer(store, sink)
+    finalizer.finalize_all()
+    reader = ParagraphReader(driver, engine, finalizer)
+    scroll_element = None
+    
+    def extract_and_save_content(rows):
+        """
+        保存读取到的段落 (说话人, 时间, 内容)
+        返回新增内容数量（有更新时额外加1）
+        """
+        new_items_count, updated_items_count, changed = store.add_rows(rows)
+        count("rows_new", new_items_count)
+        count("rows_updated", updated_items_count)
+        
+        # 如果有新增或更新的内容，保存到文件
+        if changed:
+            print(f"发现 {new_items_count} 条新对话，更新 {updated_items_count} 条已存在的对话")
+            sink.write(store, changed)
+            # 记录当前滚动位置，中断后可以从这里继续
+            if checkpoint is not None and scroll_element is not None:
+                checkpoint.save(driver.execute_script("return arguments[0].scrollTop;", scroll_element), len(store))
+        
+        # 已滚出渲染范围的段落定稿，之后不再读取
+        finalizer.update(rows, reader.rendered_keys)
+        
+        return new_items_count + (1 if updated_items_count > 0 else 0)
+    
+    # 获取初始内容
+    print("读取初始内容...")
+    initial_paragraphs = reader.read()
+    initial_count = reader.rendered_count
+    print(f"初始段落数: {initial_count}")
+    
+    # 先处理初始内容
+    initial_new_items = extract_and_save_content(initial_paragraphs)
+    print(f"初始内容中发现 {initial_new_items} 条对话")
+    
+    # 初始化滚动相关变量
+    prev_count = initial_count
+    current_count = initial_count
+    no_change_count = 0
+    max_no_change = 5
+    scroll_attempts = 0
+    last_content_hash = store.fingerprint
+    
+    target_container, scroll_element = find_scroll_container(driver)
+    # 记录和恢复滚动位置需要真正滚动的容器，.rc-virtual-list-holder-inner 本身不滚动（与 observe_load_steps 相同）
+    scroll_element = target_container or scroll_element
+    
+    # 从检查点恢复时直接跳到上次的滚动位置
+    if checkpoint is not None and checkpoint.scroll_top:
+        print(f"从检查点恢复，跳转到滚动位置 {checkpoint.scroll_top}...")
+        reached = jump_to_scroll_offset(driver, scroll_element, checkpoint.scroll_top)
+        print(f"已跳转到滚动位置 {reached}")
+        current_count = reader.count()
+        extract_and_save_content(reader.read())
+        last_content_hash = store.fingerprint
+    
     # 循环滚动直到所有内容都被加载
     pause_between_wheel_events = 0.3  # 减少滚动间隔
     scroll_step = 100  # 减小滚动步长到100像素
@@ -301,6 +817,8 @@ def scroll_and_load_all_content(driver, output_file):
     
     # 开始滚动加载更多内容
     print("开始滚动加载更多内容...")
+    started_at = time.monotonic()
+    rows_at_start = len(store)
     
     while True:
         scroll_attempts += 1
@@ -314,7 +832,7 @@ def scroll_and_load_all_content(driver, output_file):
                 
                 # 移动到容器并点击
                 ActionChains(driver).move_to_element(target_container).click().perform()
-                time.sleep(0.3)
+                sleep(0.3)
                 
                 # 分批次执行滚动，每批次后检查内容
                 for batch in range(4):  # 4个批次
@@ -331,40 +849,39 @@ def scroll_and_load_all_content(driver, output_file):
                             });
                             element.dispatchEvent(event);
                         """, target_container, scroll_step)
-                        time.sleep(pause_between_wheel_events)
+                        sleep(pause_between_wheel_events)
                     
                     # 每批次滚动后等待内容加载并检查
-                    time.sleep(0.2)  # 从0.5减少到0.2秒
-                    batch_paragraphs = driver.find_elements(By.CLASS_NAME, "paragraph-editor-wrapper")
-                    batch_count = len(batch_paragraphs)
+                    sleep(0.2)  # 从0.5减少到0.2秒
+                    batch_count = reader.count()
                     
                     if batch_count > current_count:
                         print(f"批次 {batch + 1} 发现新内容，从 {current_count} 增加到 {batch_count}")
                         # 提取并保存新内容
-                        new_items_count, current_content = extract_and_save_content(batch_paragraphs, current_content)
+                        new_items_count = extract_and_save_content(reader.read())
                         current_count = batch_count
                         
                         if new_items_count > 0:
                             # 发现新内容，重置计数器
                             no_change_count = 0
-                            last_content_hash = hashlib.md5(str(current_content).encode()).hexdigest()
+                            last_content_hash = store.fingerprint
                             break  # 跳出当前批次循环，开始新的滚动尝试
             except Exception as e:
                 print(f"鼠标滚轮滚动失败: {e}")
         
         # 等待新内容加载
-        time.sleep(0.2)  # 从0.5减少到0.2秒
+        sleep(0.2)  # 从0.5减少到0.2秒
         
         # 提取当前所有段落
-        paragraphs = driver.find_elements(By.CLASS_NAME, "paragraph-editor-wrapper")
-        current_count = len(paragraphs)
+        paragraphs = reader.read()
+        current_count = reader.rendered_count
         print(f"当前段落数: {current_count}")
         
         # 提取并保存新内容
-        new_items_count, current_content = extract_and_save_content(paragraphs, current_content)
+        new_items_count = extract_and_save_content(paragraphs)
         
-        # 计算当前内容的哈希值
-        current_content_hash = hashlib.md5(str(current_content).encode()).hexdigest()
+        # 当前内容的滚动指纹
+        current_content_hash = store.fingerprint
         
         if new_items_count > 0:
             no_change_count = 0
@@ -395,18 +912,18 @@ def scroll_and_load_all_content(driver, output_file):
                             });
                             element.dispatchEvent(event);
                         """, target_container, temp_scroll_step)
-                        time.sleep(pause_between_wheel_events)  # 使用相同的间隔时间
+                        sleep(pause_between_wheel_events)  # 使用相同的间隔时间
                     
                     # 检查是否发现新内容
-                    time.sleep(0.2)  # 从0.5减少到0.2秒
-                    retry_paragraphs = driver.find_elements(By.CLASS_NAME, "paragraph-editor-wrapper")
-                    if len(retry_paragraphs) > current_count:
+                    sleep(0.2)  # 从0.5减少到0.2秒
+                    retry_count = reader.count()
+                    if retry_count > current_count:
                         print("使用更小步长滚动发现新内容")
-                        new_items_count, current_content = extract_and_save_content(retry_paragraphs, current_content)
+                        new_items_count = extract_and_save_content(reader.read())
                         if new_items_count > 0:
                             no_change_count = 0
-                            current_count = len(retry_paragraphs)
-                            last_content_hash = hashlib.md5(str(current_content).encode()).hexdigest()
+                            current_count = retry_count
+                            last_content_hash = store.fingerprint
         
         # 如果连续多次没有发现新内容，且内容哈希值也没有变化，则认为已经加载完成
         if no_change_count >= max_no_change:
@@ -414,68 +931,261 @@ def scroll_and_load_all_content(driver, output_file):
             break
     
     # 最后再次检查是否有新内容
-    final_paragraphs = driver.find_elements(By.CLASS_NAME, "paragraph-editor-wrapper")
-    final_new_items, _ = extract_and_save_content(final_paragraphs, current_content)
+    final_paragraphs = reader.read()
+    final_new_items = extract_and_save_content(final_paragraphs)
     
     if final_new_items > 0:
         print(f"最终检查发现 {final_new_items} 条新对话")
+    current_metrics().info['reached_end'] = bool(driver.execute_script(
+        "return arguments[0].scrollTop + arguments[0].clientHeight >= arguments[0].scrollHeight - 2;",
+        scroll_element))
     
     # 汇报最终结果
-    print(f"提取完成，共找到 {len(saved_transcript)} 条对话")
+    elapsed = time.monotonic() - started_at
+    if elapsed > 0:
+        print(f"滚动阶段用时 {elapsed:.1f} 秒，平均每秒提取 {(len(store) - rows_at_start) / elapsed:.1f} 条对话")
+    print(f"提取完成，共找到 {len(store)} 条对话")
     print(f"最终保存结果到 {output_file}")
+    reader.report()
+    print(f"增量提取: {finalizer.finalized_total} 条对话已定稿，内存中保留 {store.resident_count} 条")
+    if owns_sink:
+        sink.close(store)
+    
+    return store
+
+def observe_and_load_all_content(driver, output_file, store=None, sink=None, checkpoint=None,
+                                 scheduler=None, quiet_ms=800, settle_ms=120, step_timeout_ms=5000,
+                                 max_steps=50000):
+    """
+    使用 MutationObserver 监听虚拟列表加载内容，代替固定的 sleep 和空闲重试计数
+
+    页面内的观察者缓存新渲染的段落；每一步滚动和等待在一次异步脚本调用中完成，
+    有新段落并且稳定 settle_ms 毫秒、或者 quiet_ms 毫秒内没有任何变化时立即返回。
+    每一步的目标位置由 ScrollScheduler 根据可视高度和段落高度计算，直接设置 scrollTop。
+    列表滚动到底部并且安静下来、且这一步没有新内容时认为加载完成。
+    
+    Args:
+        driver: Selenium WebDriver对象
+        output_file: 输出文件路径
+        store: 保存对话的 TranscriptStore，None 时新建
+        sink: 输出，参见 scroll_and_load_all_content
+        checkpoint: ResumeCheckpoint，参见 scroll_and_load_all_content
+        scheduler: ScrollScheduler，None 时使用默认参数新建
+        quiet_ms: 多少毫秒内没有DOM变化视为安静
+        settle_ms: 有新段落后等待多少毫秒没有变化再返回
+        step_timeout_ms: 每一步最长等待时间
+        max_steps: 最多滚动步数
+        
+    Returns:
+        TranscriptStore: 参见 scroll_and_load_all_content；无法安装观察者时返回 None，由调用方回退到滚轮滚动
+    """
+    steps = observe_load_steps(driver, output_file, store=store, sink=sink, checkpoint=checkpoint,
+                               scheduler=scheduler, quiet_ms=quiet_ms, settle_ms=settle_ms,
+                               step_timeout_ms=step_timeout_ms, max_steps=max_steps)
+    try:
+        options = next(steps)
+        while True:
+            options = steps.send(driver.execute_async_script(SCROLL_AND_WAIT_JS, options))
+    except StopIteration as stop:
+        return stop.value
+
+def observe_load_steps(driver, output_file, store=None, sink=None, checkpoint=None,
+                       scheduler=None, quiet_ms=800, settle_ms=120, step_timeout_ms=5000,
+                       max_steps=50000):
+    """
+    observe_and_load_all_content 的滚动过程，以生成器的形式由调用方执行每一步
+
+    每次 yield SCROLL_AND_WAIT_JS 的参数，调用方执行脚本后把返回结果 send 回来；
+    生成器结束时的返回值与 observe_and_load_all_content 相同。
+    这样同一个 driver 可以轮流推进多个标签页中的提取，参见 multi_tab_extractor.py。
+    除滚动等待以外的 driver 调用在生成器内直接执行，调用方需确保此时已切换到对应的标签页。
+    """
+    if store is None:
+        store = TranscriptStore()
+    
+    target_container, scroll_element = find_scroll_container(driver)
+    try:
+        rendered = driver.execute_script(INSTALL_OBSERVER_JS, target_container or scroll_element,
+                                         PARAGRAPH_CLASS, CONTENT_SPAN_SELECTOR, not store.keep_longest)
+    except Exception as e:
+        print(f"安装 MutationObserver 失败: {e}")
+        return None
+    print(f"已在虚拟列表上安装 MutationObserver，当前已渲染 {rendered} 个段落")
+    
+    owns_sink = sink is None
+    if owns_sink:
+        sink = JsonRewriteSink(output_file)
+    driver.set_script_timeout(step_timeout_ms / 1000 + 10)
+    round_trips = 0
+    finalizer = RowFinalizer(store, sink)
+    finalizer.finalize_all()
+    
+    def step(scroll_to=-1, until_quiet=False):
+        """滚动一步并等待，保存新内容，返回 (页面返回结果, 新增数量, 更新数量)"""
+        nonlocal round_trips
+        round_trips += 1
+        result = yield {
+            'scrollTo': scroll_to, 'quietMs': quiet_ms, 'settleMs': settle_ms,
+            'timeoutMs': step_timeout_ms, 'untilQuiet': until_quiet, 'finalize': finalizer.take_outbox()
+        }
+        if result is None:
+            raise RuntimeError("页面中的 MutationObserver 状态丢失")
+        count("sweeps")
+        rows = list(zip(result['speakers'], result['times'], result['contents']))
+        new_items_count, updated_items_count, changed = store.add_rows(rows)
+        count("rows_new", new_items_count)
+        count("rows_updated", updated_items_count)
+        if changed:
+            print(f"发现 {new_items_count} 条新对话，更新 {updated_items_count} 条已存在的对话")
+            sink.write(store, changed)
+            if checkpoint is not None:
+                checkpoint.save(result['scrollTop'], len(store))
+        # 已滚出渲染范围的段落定稿，页面之后不再读取
+        finalizer.update(rows, result['renderedKeys'])
+        return result, new_items_count, updated_items_count
+    
+    # 等待初始内容渲染稳定
+    print("等待初始内容加载...")
+    result, _, _ = yield from step(until_quiet=True)
+    
+    # 从检查点恢复时直接跳到上次的滚动位置
+    if checkpoint is not None and checkpoint.scroll_top:
+        print(f"从检查点恢复，跳转到滚动位置 {checkpoint.scroll_top}...")
+        result, _, _ = yield from step(scroll_to=checkpoint.scroll_top, until_quiet=True)
+        print(f"已跳转到滚动位置 {result['scrollTop']}")
+    
+    print("开始滚动加载更多内容...")
+    if scheduler is None:
+        scheduler = ScrollScheduler()
+    started_at = time.monotonic()
+    rows_at_start = len(store)
+    last_report = started_at
+    last_scroll_top = None
+    stalled_steps = 0
+    skipped = False
+    # 上一步可视区域内的最后一个段落；下一步之后它仍应处于渲染范围内，否则中间的段落可能被跳过
+    anchor = result['lastVisible']
+    reached_end = False
+    for _ in range(max_steps):
+        target = scheduler.next_target(result, skipped)
+        result, new_items_count, updated_items_count = yield from step(scroll_to=target)
+        changed = new_items_count > 0 or updated_items_count > 0
+        
+        skipped = (anchor is not None and anchor not in result['renderedKeys']
+                   and not result['atEnd'] and scheduler.can_shrink())
+        if skipped:
+            print(f"步长 {scheduler.last_step}px 可能跳过了段落，缩小步长后重新滚动")
+            continue
+        anchor = result['lastVisible'] or anchor
+        
+        now = time.monotonic()
+        if now - last_report >= 5:
+            last_report = now
+            rate = (len(store) - rows_at_start) / (now - started_at)
+            print(f"已提取 {len(store)} 条对话，{rate:.1f} 条/秒，当前步长 {scheduler.last_step}px")
+        
+        if result['atEnd'] and result['quiet'] and not changed:
+            print("已滚动到列表末尾，内容加载完成")
+            reached_end = True
+            break
+        
+        # 滚动位置不再变化又没有新内容，说明列表无法继续滚动
+        if result['scrollTop'] == last_scroll_top and result['quiet'] and not changed:
+            stalled_steps += 1
+            if stalled_steps >= 3:
+                print(f"滚动位置停留在 {last_scroll_top} 不再变化，停止滚动")
+                break
+        else:
+            stalled_steps = 0
+        last_scroll_top = result['scrollTop']
+    else:
+        print(f"已达到最大滚动步数 {max_steps}，停止滚动")
+    # 没有到达列表末尾时结果可能不完整，调用方（例如 meeting_cache.py）据此判断是否可信
+    current_metrics().info['reached_end'] = reached_end
+    
+    elapsed = time.monotonic() - started_at
+    if elapsed > 0:
+        print(f"滚动阶段用时 {elapsed:.1f} 秒，平均每秒提取 {(len(store) - rows_at_start) / elapsed:.1f} 条对话")
+    
+    driver.execute_script("if (window.__miaojiObserver) { window.__miaojiObserver.disconnect(); }")
     
-    return saved_transcript
+    # 汇报最终结果
+    print(f"提取完成，共找到 {len(store)} 条对话")
+    print(f"WebDriver往返次数: MutationObserver 滚动等待 {round_trips} 次")
+    print(f"增量提取: {finalizer.finalized_total} 条对话已定稿，内存中保留 {store.resident_count} 条")
+    if owns_sink:
+        sink.close(store)
+    
+    return store
 
 def convert_to_csv(json_file, csv_file):
     """
-    将JSON格式转换为CSV格式
+    将JSON格式转换为CSV格式（流式读取，参见 exporter.py）
     """
-    import csv
-    
-    # 读取JSON文件
-    with open(json_file, 'r', encoding='utf-8') as f:
-        transcript = json.load(f)
-    
-    # 写入CSV文件
-    with open(csv_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        # 写入表头
-        writer.writerow(['说话人', '时间', '内容'])
-        # 写入数据
-        for item in transcript:
-            writer.writerow([
-                item['speaker'],
-                item['time'],
-                item['content']
-            ])
+    records = export(json_file, {'csv': csv_file})
     
     print(f"已成功将 {json_file} 转换为 {csv_file}")
-    print(f"共转换了 {len(transcript)} 条对话")
+    print(f"共转换了 {records} 条对话")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("用法: python selenium_extractor.py <会议纪要URL> [输出文件.json]")
-        print("示例: python selenium_extractor.py https://shengcaiyoushu01.feishu.cn/minutes/obcnh9cy43l7hi2gtw9g52tb")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="从飞书会议纪要URL提取会议记录",
+        epilog="示例: python selenium_extractor.py https://shengcaiyoushu01.feishu.cn/minutes/obcnh9cy43l7hi2gtw9g52tb")
+    parser.add_argument("url", nargs="?", help="会议纪要URL")
+    parser.add_argument("output_file", nargs="?", default="output.json", help="输出文件，默认 output.json")
+    parser.add_argument("--engine", choices=["js", "dom"], default="js",
+                        help="wheel 加载方式下的段落提取方式：js 单次脚本批量提取（默认），dom 逐元素提取")
+    parser.add_argument("--source", choices=["dom", "network"], default="dom",
+                        help="数据来源：dom 滚动页面提取（默认），network 捕获页面请求的文字记录接口响应，未捕获到时回退到 dom")
+    parser.add_argument("--loader", choices=["observer", "wheel"], default="observer",
+                        help="加载方式：observer 用MutationObserver等待新内容（默认），wheel 滚轮事件加固定等待")
+    parser.add_argument("--write-mode", choices=["wal", "rewrite"], default="wal",
+                        help="保存方式：wal 追加预写日志、结束时压缩为JSON（默认），rewrite 每次变化都重写JSON")
+    parser.add_argument("--csv", action="store_true", help="结束时同时写出同名的CSV文件")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次中断时记录的滚动位置继续提取，已提取的对话不会重复抓取")
+    parser.add_argument("--fast", action="store_true",
+                        help="快速模式：屏蔽图片、字体和音视频，DOM就绪后即开始操作页面")
+    parser.add_argument("--user-data-dir", metavar="DIR",
+                        help="复用持久化的Chrome用户数据目录（保留飞书登录状态）")
+    parser.add_argument("--profile", action="store_true",
+                        help="在 cProfile 下运行，性能数据保存为与输出同名的 .prof 文件")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="结束时合并被拆分、截断或重叠的对话（参见 reconcile.py）")
+    parser.add_argument("--compact-log", metavar="LOG",
+                        help="不访问URL，仅将中断运行留下的预写日志恢复为 output_file")
+    args = parser.parse_args()
+    
+    # 恢复中断运行留下的预写日志
+    if args.compact_log:
+        output_file = args.url or args.output_file
+        csv_file = output_file.replace('.json', '.csv') if args.csv else None
+        restored = compact_log(args.compact_log, output_file, csv_file, reconcile=args.reconcile)
+        print(f"已从 {args.compact_log} 恢复 {restored} 条对话到 {output_file}")
+        sys.exit(0)
+    
+    if not args.url:
+        parser.error("请提供会议纪要URL")
         
-    url = sys.argv[1]
+    url = args.url
     
     if not (url.startswith('http://') or url.startswith('https://')):
         print("请提供有效的URL，包含http://或https://前缀")
         sys.exit(1)
     
-    # 如果只提供一个参数，默认输出到output.json
-    if len(sys.argv) == 2:
-        output_file = "output.json"
-    else:
-        output_file = sys.argv[2]
+    output_file = args.output_file
+    csv_file = output_file.replace('.json', '.csv')
     
     # 提取会议记录
-    success = extract_transcript_with_selenium(url, output_file)
-    
-    if success:
-        # 提供CSV转换选项
-        csv_file = output_file.replace('.json', '.csv')
-        convert = input(f"是否要将结果转换为CSV格式并保存到 {csv_file}？(y/n): ")
-        if convert.lower() == 'y':
-            convert_to_csv(output_file, csv_file)
+    extract_options = dict(engine=args.engine, write_mode=args.write_mode, csv_file=csv_file if args.csv else None,
+                           resume=args.resume, loader=args.loader, source=args.source, fast=args.fast,
+                           user_data_dir=args.user_data_dir, reconcile=args.reconcile)
+    if args.profile:
+        success = run_with_profile(extract_transcript_with_selenium, default_profile_file(output_file),
+                                   url, output_file, **extract_options)
+    else:
+        success = extract_transcript_with_selenium(url, output_file, **extract_options)
+    
+    if success and not args.csv:
+        print(f"如需其他格式，可以使用 python exporter.py {output_file} --csv {csv_file}（另支持 --jsonl/--srt/--vtt/--parquet）")
+    sys.exit(0 if success else 1)
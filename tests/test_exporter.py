@@ -0,0 +1,20 @@
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exporter import iter_json_array
+
+
+def test_iter_json_array_numbers_across_chunks():
+    assert list(iter_json_array(io.StringIO('[123, 4567]'), chunk_size=3)) == [123, 4567]
+    assert list(iter_json_array(io.StringIO('[72154.003, -1.5e-9, 2]'), chunk_size=1)) == [72154.003, -1.5e-9, 2]
+
+
+def test_iter_json_array_matches_json_load():
+    data = [{'speaker': "说话人 1", 'time': "00:01:41", 'content': "听得到吗？"}, 12, [3.25, None, True], "结尾"]
+    text = json.dumps(data, ensure_ascii=False)
+    for chunk_size in (1, 2, 3, 5, 64):
+        assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == data
@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reconcile import merge_versions, overlap_length, reconcile
+
+
+def row(speaker, timestamp, content):
+    return {'speaker': speaker, 'time': timestamp, 'content': content}
+
+
+def test_overlap_length():
+    assert overlap_length("abcdefgh", "efghijk") == 4
+    assert overlap_length("aaaa", "aaab") == 3
+    assert overlap_length("我们开始吧", "始吧") == 2
+    assert overlap_length("abc", "xyz") == 0
+    assert overlap_length("", "abc") == 0
+    # right 比 left 长时只比较 left 的全部
+    assert overlap_length("ab", "abcdef") == 2
+
+
+def test_merge_versions_prefix_and_overlap():
+    assert merge_versions("今天我们", "今天我们讨论") == ("今天我们讨论", "extended")
+    assert merge_versions("今天我们讨论", "今天我们") == ("今天我们讨论", None)
+    assert merge_versions("今天我们讨论", "我们讨论一下预算") == ("今天我们讨论一下预算", "overlap")
+
+
+def test_merge_versions_keeps_longer_version():
+    assert merge_versions("我们开始吧", "始吧") == ("我们开始吧", None)
+    assert merge_versions("始吧", "我们开始吧") == ("我们开始吧", "extended")
+    assert merge_versions("第一版内容很长", "改了") == ("第一版内容很长", "kept")
+    assert merge_versions("改了", "第一版内容很长") == ("第一版内容很长", "replaced")
+
+
+def test_reconcile_versions_of_same_row():
+    records, merges = reconcile([row("A", "00:00:01", "今天我们讨论"), row("A", "00:00:01", "我们讨论一下预算问题"),
+                                 row("A", "00:00:01", "始吧")])
+    assert records == [row("A", "00:00:01", "今天我们讨论一下预算问题")]
+    assert [merge['action'] for merge in merges] == ["overlap", "kept"]
+
+
+def test_reconcile_adjacent_rows():
+    records, merges = reconcile([
+        row("A", "00:00:01", "今天我们讨论一下预算问题"),
+        row("A", "00:00:05", "预算问题"),
+        row("B", "00:00:09", "好的好的好的"),
+        row("B", "00:00:12", "好的好的好的，那我先说"),
+        row("B", "00:00:20", "那我先说吧，第一点"),
+    ])
+    assert records == [row("A", "00:00:01", "今天我们讨论一下预算问题"),
+                       row("B", "00:00:09", "好的好的好的，那我先说吧，第一点")]
+    assert [merge['action'] for merge in merges] == ["contained", "prefix", "overlap"]
+
+
+def test_reconcile_keeps_repeated_short_replies():
+    stream = [row("A", "00:00:01", "好的。"), row("A", "00:00:08", "好的。"), row("A", "00:00:09", "好的好的。")]
+    records, merges = reconcile(stream)
+    assert records == stream
+    assert merges == []
+
+
+def test_reconcile_fragments():
+    stream = [
+        row("说话人 2", "00:02:08", "现在听得到吗？这跟我之前调试。"),
+        row("说话人 1", "00:02:26", "的。"),
+        row("说话人 2", "00:02:27", "听得到，但是声音小，是吧？"),
+        row("说话人 1", "00:02:30", "对。"),
+        row("说话人 1", "00:02:33", "我觉得可以"),
+        row("说话人 1", "00:02:35", "的。"),
+        row("说话人 2", "00:02:40", "好。"),
+    ]
+    records, merges = reconcile(stream)
+    # 夹在原说话人两条对话之间的片段并入原说话人的对话并去掉多出来的句号；
+    # 问句之后的回答和最后一条之后没有回到原说话人的短对话保持独立
+    assert records == [row("说话人 2", "00:02:08", "现在听得到吗？这跟我之前调试的。"), stream[2], stream[3],
+                       row("说话人 1", "00:02:33", "我觉得可以的。"), stream[6]]
+    assert merges == [{'action': "fragment", 'speaker': "说话人 1", 'time': "00:02:26", 'into': "00:02:08"},
+                      {'action': "fragment", 'speaker': "说话人 1", 'time': "00:02:35", 'into': "00:02:33"}]
+
+    assert reconcile(stream, fragment_chars=0) == (stream, [])
+
+
+def test_reconcile_is_sorted_and_skips_incomplete_rows():
+    records, _ = reconcile([row("B", "00:01:00", "后面"), row("A", "00:00:10", "前面"), row("A", "", "没有时间")])
+    assert records == [row("A", "00:00:10", "前面"), row("B", "00:01:00", "后面")]
@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_columns import ColumnarTranscript
+
+
+def row(speaker, timestamp, content):
+    return {'speaker': speaker, 'time': timestamp, 'content': content}
+
+
+def test_talk_time_uses_gap_to_next_segment():
+    transcript = ColumnarTranscript.from_records([
+        row("A", "00:06:07", "很长的一段话" * 50),
+        row("B", "00:07:03", "嗯。"),
+        row("A", "00:07:05", "对"),
+        row("A", "00:07:10", "然后"),
+        row("B", "00:07:20", "好。"),
+    ])
+    talk_time = transcript.talk_time()
+    assert talk_time["A"] == 56 + 15
+    assert talk_time == transcript.merge_consecutive().talk_time()
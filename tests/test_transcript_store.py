@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_store import TranscriptStore
+
+
+def test_keeps_longest_version():
+    store = TranscriptStore()
+    store.add_rows([("A", "00:00:01", "今天我们讨论")])
+    assert store.add_rows([("A", "00:00:01", "讨论一下")]) == (0, 0, [])
+    assert store.to_list() == [{'speaker': "A", 'time': "00:00:01", 'content': "今天我们讨论"}]
+
+
+def test_capture_every_version():
+    store = TranscriptStore(keep_longest=False)
+    store.add_rows([("A", "00:00:01", "今天我们讨论")])
+    new, updated, changed = store.add_rows([("A", "00:00:01", "讨论一下"), ("A", "00:00:01", "讨论一下"),
+                                            ("A", "00:00:01", "讨论一下预算")])
+    assert (new, updated) == (0, 1)
+    assert [record['content'] for record in changed] == ["讨论一下", "讨论一下预算"]
+    assert store.get("A", "00:00:01")['content'] == "讨论一下预算"
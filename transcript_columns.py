@@ -0,0 +1,253 @@
+"""
+紧凑的列式会议记录，用于对整个语料做统计
+
+每条对话不再是三个字符串组成的字典，而是按列保存：
+- 说话人去重后编号，speaker_ids 为 array('I')
+- 时间解析为秒数，seconds 为 array('q')，按时间排序，时间无法解析的对话排在最后
+- 所有内容拼接为一个字符串，offsets 记录每条对话在其中的起止位置
+
+按时间范围截取用二分查找，说话人发言时长统计和合并同一说话人的连续对话都直接在列上计算，
+不需要生成字典。安装了 NumPy 时可以用 to_numpy() 零拷贝地取得各列。
+
+用法:
+    python transcript_columns.py output.json
+    python transcript_columns.py output.json --from 00:10:00 --to 00:20:00 --merge
+"""
+import argparse
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from exporter import SUBTITLE_MAX_SECONDS, SUBTITLE_MIN_SECONDS, SUBTITLE_SECONDS_PER_CHAR, iter_records
+from transcript_store import parse_time_to_seconds
+
+# 时间无法解析的对话使用的秒数，排在所有对话之后
+UNKNOWN_SECONDS = (1 << 63) - 1
+
+
+def format_seconds(seconds):
+    """秒数转换为 "HH:MM:SS"，UNKNOWN_SECONDS 转换为空字符串"""
+    if seconds == UNKNOWN_SECONDS:
+        return ''
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def segment_duration(start, next_start, chars):
+    """
+    一条对话的发言时长（秒）
+
+    有下一条对话时为到下一条对话开始的间隔，这样合并连续对话前后的总时长相同；
+    最后一条对话与字幕导出相同，按字数估计并限制在最短和最长显示时长之间。
+    """
+    if next_start is not None:
+        return next_start - start
+    return min(SUBTITLE_MAX_SECONDS, max(SUBTITLE_MIN_SECONDS, chars * SUBTITLE_SECONDS_PER_CHAR))
+
+
+class ColumnarTranscript:
+    """
+    列式存储的会议记录
+
+    说话人名称表可以在多个会议之间共享（传入同一个 speakers 列表），
+    这样整个语料中相同的说话人只保存一次。
+    """
+
+    def __init__(self, speakers=None):
+        self.speakers = speakers if speakers is not None else []
+        self._speaker_index = {name: index for index, name in enumerate(self.speakers)}
+        self.speaker_ids = array('I')
+        self.seconds = array('q')
+        self.offsets = array('Q', [0])
+        self.content = ''
+
+    @classmethod
+    def from_records(cls, records, speakers=None):
+        """
+        从对话记录（字典）构建，按时间排序，同一时间保持原有顺序
+
+        Args:
+            records: 可迭代的 {'speaker', 'time', 'content'}，例如 exporter.iter_records() 的结果
+            speakers: 共享的说话人名称表
+        """
+        transcript = cls(speakers)
+        speaker_ids = transcript.speaker_ids
+        seconds = transcript.seconds
+        contents = []
+        for record in records:
+            speaker_ids.append(transcript.speaker_id(record['speaker']))
+            value = parse_time_to_seconds(record.get('time'))
+            seconds.append(UNKNOWN_SECONDS if value is None else value)
+            contents.append(record['content'])
+
+        if any(seconds[i] > seconds[i + 1] for i in range(len(seconds) - 1)):
+            order = sorted(range(len(seconds)), key=seconds.__getitem__)
+            transcript.speaker_ids = array('I', (speaker_ids[i] for i in order))
+            transcript.seconds = array('q', (seconds[i] for i in order))
+            contents = [contents[i] for i in order]
+        transcript._set_contents(contents)
+        return transcript
+
+    @classmethod
+    def load(cls, input_file, speakers=None):
+        """从 output.json、JSONL 或 HTML 文件流式读取"""
+        return cls.from_records(iter_records(input_file), speakers)
+
+    def _set_contents(self, contents):
+        offsets = self.offsets = array('Q', [0])
+        position = 0
+        for text in contents:
+            position += len(text)
+            offsets.append(position)
+        self.content = ''.join(contents)
+
+    def speaker_id(self, name):
+        """说话人名称对应的编号，新的名称追加到名称表"""
+        index = self._speaker_index.get(name)
+        if index is None:
+            index = self._speaker_index[name] = len(self.speakers)
+            self.speakers.append(name)
+        return index
+
+    def __len__(self):
+        return len(self.seconds)
+
+    def text(self, index):
+        return self.content[self.offsets[index]:self.offsets[index + 1]]
+
+    def text_length(self, index):
+        return self.offsets[index + 1] - self.offsets[index]
+
+    def record(self, index):
+        """第 index 条对话，格式与 output.json 相同"""
+        return {
+            'speaker': self.speakers[self.speaker_ids[index]],
+            'time': format_seconds(self.seconds[index]),
+            'content': self.text(index)
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def to_list(self):
+        return list(self)
+
+    def window(self, start=0, end=None):
+        """
+        开始时间在 [start, end) 秒之间的对话的下标范围
+
+        Returns:
+            tuple: (lo, hi)，对话下标为 range(lo, hi)
+        """
+        lo = bisect_left(self.seconds, start)
+        hi = len(self) if end is None else bisect_left(self.seconds, end, lo)
+        return lo, hi
+
+    def time_slice(self, start=0, end=None):
+        """截取 [start, end) 秒之间的对话，返回共享说话人名称表的新对象"""
+        lo, hi = self.window(start, end)
+        return self._take(lo, hi)
+
+    def _take(self, lo, hi):
+        part = ColumnarTranscript(self.speakers)
+        part._speaker_index = self._speaker_index
+        part.speaker_ids = self.speaker_ids[lo:hi]
+        part.seconds = self.seconds[lo:hi]
+        base = self.offsets[lo]
+        part.offsets = array('Q', (offset - base for offset in self.offsets[lo:hi + 1]))
+        part.content = self.content[base:self.offsets[hi]]
+        return part
+
+    def talk_time(self, start=0, end=None):
+        """
+        每个说话人的发言时长（秒），时长的计算方法见 segment_duration
+
+        Returns:
+            dict: {说话人: 秒数}，按时长从多到少排列
+        """
+        lo, hi = self.window(start, end)
+        totals = Counter()
+        seconds = self.seconds
+        last_known = self.window(0, UNKNOWN_SECONDS)[1]
+        for index in range(lo, min(hi, last_known)):
+            next_start = seconds[index + 1] if index + 1 < last_known else None
+            totals[self.speaker_ids[index]] += segment_duration(seconds[index], next_start, self.text_length(index))
+        return {self.speakers[speaker]: total for speaker, total in totals.most_common()}
+
+    def merge_consecutive(self, separator=''):
+        """
+        合并同一说话人的连续对话，合并后的时间为第一条对话的时间
+
+        Returns:
+            ColumnarTranscript: 共享说话人名称表的新对象
+        """
+        merged = ColumnarTranscript(self.speakers)
+        merged._speaker_index = self._speaker_index
+        contents = []
+        for index in range(len(self)):
+            speaker = self.speaker_ids[index]
+            if contents and merged.speaker_ids[-1] == speaker and self.seconds[index] != UNKNOWN_SECONDS:
+                contents[-1] += separator + self.text(index)
+                continue
+            merged.speaker_ids.append(speaker)
+            merged.seconds.append(self.seconds[index])
+            contents.append(self.text(index))
+        merged._set_contents(contents)
+        return merged
+
+    def to_numpy(self):
+        """
+        以 NumPy 数组零拷贝地返回各列（需要安装 numpy）
+
+        Returns:
+            dict: speaker_ids、seconds、offsets 三个数组
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise RuntimeError("to_numpy 需要安装numpy: pip install numpy")
+        return {
+            'speaker_ids': np.frombuffer(self.speaker_ids, dtype=np.uint32),
+            'seconds': np.frombuffer(self.seconds, dtype=np.int64),
+            'offsets': np.frombuffer(self.offsets, dtype=np.uint64)
+        }
+
+    def nbytes(self):
+        """各列占用的大致内存（字节），说话人名称表不计入"""
+        return (sys.getsizeof(self.content) + self.speaker_ids.itemsize * len(self.speaker_ids)
+                + self.seconds.itemsize * len(self.seconds) + self.offsets.itemsize * len(self.offsets))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以列式结构读取会议记录，统计说话人发言时长")
+    parser.add_argument("input_file", help="output.json、JSONL文件或保存的HTML页面")
+    parser.add_argument("--from", dest="start", default="0", help="开始时间（HH:MM:SS 或秒数）")
+    parser.add_argument("--to", dest="end", help="结束时间（不包含）")
+    parser.add_argument("--merge", action="store_true", help="合并同一说话人的连续对话后再输出")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="打印时间范围内的前 N 条对话")
+    args = parser.parse_args()
+
+    start = parse_time_to_seconds(args.start)
+    end = parse_time_to_seconds(args.end) if args.end else None
+    if start is None or (args.end and end is None):
+        parser.error("时间格式应为 HH:MM:SS、MM:SS 或秒数")
+
+    transcript = ColumnarTranscript.load(args.input_file)
+    print(f"共 {len(transcript)} 条对话，{len(transcript.speakers)} 个说话人，"
+          f"列式存储约占 {transcript.nbytes() / 1024 / 1024:.2f} MB")
+    part = transcript.time_slice(start, end)
+    if args.merge:
+        part = part.merge_consecutive()
+    print(f"时间范围内 {len(part)} 条对话" + ("（已合并连续对话）" if args.merge else ""))
+    for speaker, seconds in part.talk_time().items():
+        print(f"  {speaker}: {format_seconds(int(round(seconds)))}")
+    for index in range(min(args.show, len(part))):
+        record = part.record(index)
+        print(f"{record['time']} {record['speaker']}: {record['content']}")
+
+
+if __name__ == "__main__":
+    main()
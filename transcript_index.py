@@ -0,0 +1,251 @@
+"""
+把所有提取结果建立为 SQLite FTS5 全文索引，按内容或说话人搜索
+
+每条对话保存为 segments 表中的一行（会议、说话人、时间字符串、秒数、内容），
+segments_fts 使用 trigram 分词（连续三个字符为一个词），适合没有空格分词的中文；
+少于三个字符的查询无法使用 trigram 索引，改为 LIKE 扫描。
+索引是增量的：再次运行时只重新导入修改时间或大小变化了的文件。
+
+用法:
+    python transcript_index.py index outputs/ --db transcripts.db
+    python transcript_index.py search "听得到吗" --db transcripts.db --limit 20
+    python transcript_index.py search 评论 --speaker "说话人 1" --json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from exporter import iter_records
+from transcript_store import parse_time_to_seconds
+
+DEFAULT_DB = "transcripts.db"
+
+# 提取过程中产生的其他文件，不是会议记录
+IGNORED_SUFFIXES = ('.wal.jsonl', '.delta.jsonl', '.report.json', '.resume.json', '.sync.json', 'batch_summary.json')
+
+# trigram 分词最短能匹配的查询长度
+MIN_FTS_QUERY_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    segments INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    meeting_id INTEGER NOT NULL REFERENCES meetings(id),
+    speaker TEXT NOT NULL,
+    time TEXT NOT NULL,
+    seconds INTEGER,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_meeting ON segments(meeting_id, seconds);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    content, speaker, content='segments', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts(rowid, content, speaker) VALUES (new.id, new.content, new.speaker);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts(segments_fts, rowid, content, speaker) VALUES ('delete', old.id, old.content, old.speaker);
+END;
+"""
+
+
+def connect(db_file=DEFAULT_DB):
+    """打开（必要时创建）索引数据库"""
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def find_transcript_files(paths):
+    """展开命令行中的文件和目录（包括子目录），返回所有 .json/.jsonl 会议记录文件"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(('.json', '.jsonl')) and not name.endswith(IGNORED_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def index_file(conn, path, force=False, batch_size=5000):
+    """
+    导入一个会议记录文件，文件没有变化时跳过
+
+    Returns:
+        int: 导入的对话数，跳过时返回 None
+
+    Raises:
+        ValueError: 文件不是会议记录（不是对话记录的JSON数组或JSONL）
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    row = conn.execute("SELECT id, mtime, size FROM meetings WHERE path = ?", (path,)).fetchone()
+    if row is not None and not force and row[1] == stat.st_mtime and row[2] == stat.st_size:
+        return None
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    with conn:
+        if row is not None:
+            meeting_id = row[0]
+            conn.execute("DELETE FROM segments WHERE meeting_id = ?", (meeting_id,))
+        else:
+            meeting_id = conn.execute(
+                "INSERT INTO meetings (path, name, mtime, size, segments, indexed_at) VALUES (?, ?, 0, 0, 0, '')",
+                (path, name)).lastrowid
+        total = 0
+        batch = []
+        for record in iter_records(path):
+            if not isinstance(record, dict) or 'content' not in record:
+                raise ValueError("不是会议记录文件")
+            timestamp = record.get('time') or ''
+            batch.append((meeting_id, record.get('speaker') or '', timestamp,
+                          parse_time_to_seconds(timestamp), record['content']))
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT INTO segments (meeting_id, speaker, time, seconds, content) "
+                                 "VALUES (?, ?, ?, ?, ?)", batch)
+                total += len(batch)
+                batch = []
+        conn.executemany("INSERT INTO segments (meeting_id, speaker, time, seconds, content) VALUES (?, ?, ?, ?, ?)",
+                         batch)
+        total += len(batch)
+        conn.execute("UPDATE meetings SET mtime = ?, size = ?, segments = ?, indexed_at = ? WHERE id = ?",
+                     (stat.st_mtime, stat.st_size, total, time.strftime('%Y-%m-%dT%H:%M:%S'), meeting_id))
+    return total
+
+
+def index_paths(conn, paths, force=False):
+    """
+    增量导入文件和目录中的所有会议记录
+
+    Returns:
+        dict: 导入、跳过和出错的文件数以及导入的对话数
+    """
+    stats = {'indexed': 0, 'skipped': 0, 'failed': 0, 'segments': 0}
+    for path in find_transcript_files(paths):
+        try:
+            imported = index_file(conn, path, force=force)
+        except (OSError, ValueError) as e:
+            print(f"跳过 {path}: {e}")
+            stats['failed'] += 1
+            continue
+        if imported is None:
+            stats['skipped'] += 1
+        else:
+            stats['indexed'] += 1
+            stats['segments'] += imported
+            print(f"已导入 {path}: {imported} 条对话")
+    return stats
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search(conn, query, limit=20, speaker=None, meeting=None):
+    """
+    搜索对话内容
+
+    至少三个字符的查询使用 FTS5 trigram 索引（作为短语匹配，按相关度排序），
+    更短的查询用 LIKE 扫描 segments 表（按会议和时间排序）。
+
+    Returns:
+        list: 命中列表，每项包含 meeting、path、speaker、time、offset_ms 和 content
+    """
+    filters = []
+    params = []
+    if speaker:
+        filters.append("s.speaker = ?")
+        params.append(speaker)
+    if meeting:
+        filters.append("m.name = ?")
+        params.append(meeting)
+    where = "".join(f" AND {condition}" for condition in filters)
+
+    if len(query) >= MIN_FTS_QUERY_LENGTH:
+        phrase = '"' + query.replace('"', '""') + '"'
+        sql = ("SELECT m.name, m.path, s.speaker, s.time, s.seconds, s.content FROM segments_fts "
+               "JOIN segments s ON s.id = segments_fts.rowid JOIN meetings m ON m.id = s.meeting_id "
+               f"WHERE segments_fts MATCH ?{where} ORDER BY segments_fts.rank LIMIT ?")
+        rows = conn.execute(sql, [f"content : {phrase}"] + params + [limit])
+    else:
+        sql = ("SELECT m.name, m.path, s.speaker, s.time, s.seconds, s.content FROM segments s "
+               "JOIN meetings m ON m.id = s.meeting_id "
+               f"WHERE s.content LIKE ? ESCAPE '\\'{where} ORDER BY m.name, s.seconds LIMIT ?")
+        rows = conn.execute(sql, [f"%{_escape_like(query)}%"] + params + [limit])
+    return [{
+        'meeting': name,
+        'path': path,
+        'speaker': speaker_name,
+        'time': timestamp,
+        'offset_ms': seconds * 1000 if seconds is not None else None,
+        'content': content
+    } for name, path, speaker_name, timestamp, seconds, content in rows]
+
+
+def snippet(content, query, width=30):
+    """截取命中位置前后的一段内容"""
+    position = content.find(query)
+    if position < 0 or len(content) <= width * 2:
+        return content[:width * 2]
+    start = max(0, position - width)
+    return ("…" if start > 0 else "") + content[start:position + len(query) + width] + (
+        "…" if position + len(query) + width < len(content) else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会议记录全文索引（SQLite FTS5）")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"索引数据库文件，默认 {DEFAULT_DB}")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = commands.add_parser("index", help="增量导入会议记录文件或目录")
+    index_parser.add_argument("paths", nargs="+", help="output.json、JSONL文件或包含它们的目录")
+    index_parser.add_argument("--force", action="store_true", help="重新导入没有变化的文件")
+
+    search_parser = commands.add_parser("search", help="搜索对话内容")
+    search_parser.add_argument("query", help="要搜索的文字")
+    search_parser.add_argument("--limit", type=int, default=20, help="最多返回的结果数，默认 20")
+    search_parser.add_argument("--speaker", help="只搜索该说话人的对话")
+    search_parser.add_argument("--meeting", help="只搜索该会议（文件名，不含扩展名）")
+    search_parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        if args.command == "index":
+            started_at = time.monotonic()
+            stats = index_paths(conn, args.paths, force=args.force)
+            conn.execute("INSERT INTO segments_fts(segments_fts) VALUES ('optimize')")
+            conn.commit()
+            print(f"导入 {stats['indexed']} 个文件（{stats['segments']} 条对话），{stats['skipped']} 个没有变化，"
+                  f"{stats['failed']} 个出错，用时 {time.monotonic() - started_at:.1f} 秒")
+            sys.exit(0 if stats['failed'] == 0 else 1)
+
+        hits = search(conn, args.query, limit=args.limit, speaker=args.speaker, meeting=args.meeting)
+        if args.json:
+            print(json.dumps(hits, ensure_ascii=False, indent=2))
+            return
+        for hit in hits:
+            offset = f"{hit['offset_ms']}ms" if hit['offset_ms'] is not None else "-"
+            print(f"{hit['meeting']}  {hit['time']} ({offset})  {hit['speaker']}: {snippet(hit['content'], args.query)}")
+        print(f"共 {len(hits)} 条结果")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+不启动浏览器，直接解析浏览器"另存为"保存的飞书妙记HTML页面
+
+使用与 selenium_extractor.py 相同的选择器：
+paragraph-editor-wrapper 段落、div.p-user-name[user-name-content]、div.p-time[time-content]
+以及 span[data-string][data-leaf] 内容（排除 data-enter 换行），
+去重和排序规则与 scroll_and_load_all_content 相同，输出的JSON完全一致。
+
+用法:
+    python transcript_parser.py 保存的文件.html [output.json]
+    python transcript_parser.py 保存的目录/ [输出目录/] [--workers N]
+    python transcript_parser.py https://example.feishu.cn/minutes/meeting-url [output.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+from transcript_store import TranscriptStore
+
+HTML_EXTENSIONS = ('.html', '.htm')
+
+# 没有结束标签的元素
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'
+])
+
+
+class TranscriptHTMLParser(HTMLParser):
+    """
+    流式解析HTML，收集每个段落的 (说话人, 时间, 内容)
+
+    与逐元素提取一致：段落中没有 div.p-user-name 时说话人为"未知说话人"，
+    没有 div.p-time 时时间为空字符串；只取第一个说话人和时间节点。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._stack = []
+        self._paragraph_depth = None
+        self._span_depth = None
+        self._speaker = None
+        self._timestamp = None
+        self._content = []
+        self._span_text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        self._stack.append(tag)
+        depth = len(self._stack)
+        attributes = dict(attrs)
+        classes = (attributes.get('class') or '').split()
+
+        if self._paragraph_depth is None:
+            if 'paragraph-editor-wrapper' in classes:
+                self._paragraph_depth = depth
+                self._speaker = None
+                self._timestamp = None
+                self._content = []
+            return
+
+        if tag == 'div' and 'p-user-name' in classes and self._speaker is None:
+            self._speaker = attributes.get('user-name-content')
+        elif tag == 'div' and 'p-time' in classes and self._timestamp is None:
+            self._timestamp = attributes.get('time-content')
+        elif (tag == 'span' and self._span_depth is None and attributes.get('data-string') == 'true'
+              and attributes.get('data-leaf') == 'true' and attributes.get('data-enter') != 'true'):
+            self._span_depth = depth
+            self._span_text = []
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        if self._span_depth is not None:
+            self._span_text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return
+        # 自动闭合未闭合的子元素
+        while self._stack:
+            depth = len(self._stack)
+            closed = self._stack.pop()
+            if self._span_depth is not None and depth == self._span_depth:
+                self._content.append(''.join(self._span_text).strip())
+                self._span_depth = None
+            if self._paragraph_depth is not None and depth == self._paragraph_depth:
+                self._finish_paragraph()
+            if closed == tag:
+                break
+
+    def _finish_paragraph(self):
+        speaker = self._speaker
+        if speaker is None:
+            speaker = "未知说话人"
+        timestamp = self._timestamp if self._timestamp is not None else ""
+        self.rows.append((speaker, timestamp, ''.join(self._content)))
+        self._paragraph_depth = None
+
+
+def parse_html(html):
+    """
+    解析HTML文本
+
+    Returns:
+        list: 按时间排序、去重后的对话列表
+    """
+    parser = TranscriptHTMLParser()
+    parser.feed(html)
+    parser.close()
+    store = TranscriptStore()
+    store.add_rows(parser.rows)
+    return store.to_list()
+
+
+def parse_html_file(html_file, output_file):
+    """
+    解析单个HTML文件并保存为JSON
+
+    Returns:
+        tuple: (HTML文件, 对话数)
+    """
+    with open(html_file, 'r', encoding='utf-8', errors='replace') as f:
+        transcript = parse_html(f.read())
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(transcript, f, ensure_ascii=False, indent=2)
+    return html_file, len(transcript)
+
+
+def _parse_job(job):
+    html_file, output_file = job
+    try:
+        return parse_html_file(html_file, output_file) + (None,)
+    except Exception as e:
+        return html_file, 0, str(e)
+
+
+def find_html_files(directory):
+    """递归查找目录下的HTML文件"""
+    html_files = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(HTML_EXTENSIONS):
+                html_files.append(os.path.join(root, name))
+    return sorted(html_files)
+
+
+def parse_directory(input_dir, output_dir=None, workers=None):
+    """
+    使用进程池并行解析目录下的所有HTML文件
+
+    每个HTML文件输出为输出目录下相同相对路径的同名 .json 文件。
+
+    Args:
+        input_dir: 保存的HTML文件所在目录
+        output_dir: 输出目录，默认与HTML文件放在一起
+        workers: 进程数，默认为CPU核数
+
+    Returns:
+        list: 每个文件的 (HTML文件, 对话数, 错误信息或 None)
+    """
+    output_dir = output_dir or input_dir
+    jobs = []
+    for html_file in find_html_files(input_dir):
+        relative = os.path.relpath(html_file, input_dir)
+        output_file = os.path.join(output_dir, os.path.splitext(relative)[0] + '.json')
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        jobs.append((html_file, output_file))
+    if not jobs:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        return list(executor.map(_parse_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def parse_url(url):
+    """下载公开访问的会议纪要页面并解析"""
+    import requests
+
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    response.encoding = response.apparent_encoding or 'utf-8'
+    return parse_html(response.text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析保存的飞书妙记HTML页面（不需要浏览器）")
+    parser.add_argument("source", help="HTML文件、包含HTML文件的目录，或公开访问的会议纪要URL")
+    parser.add_argument("output", nargs="?", help="输出JSON文件（目录模式下为输出目录）")
+    parser.add_argument("--workers", type=int, default=None, help="目录模式下的进程数，默认为CPU核数")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        started_at = time.monotonic()
+        results = parse_directory(args.source, args.output, args.workers)
+        elapsed = time.monotonic() - started_at
+        failed = [(html_file, error) for html_file, _, error in results if error]
+        for html_file, error in failed:
+            print(f"解析 {html_file} 失败: {error}")
+        total = sum(count for _, count, _ in results)
+        print(f"共解析 {len(results)} 个文件（失败 {len(failed)} 个），提取 {total} 条对话，用时 {elapsed:.1f} 秒")
+        sys.exit(1 if failed else 0)
+
+    output_file = args.output or "output.json"
+    if args.source.startswith('http://') or args.source.startswith('https://'):
+        transcript = parse_url(args.source)
+        if not transcript:
+            print("需要登录飞书账号才能访问该会议纪要")
+            print("请在浏览器中登录后将页面另存为HTML文件，再使用本工具处理保存的HTML文件")
+            sys.exit(1)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(transcript, f, ensure_ascii=False, indent=2)
+        count = len(transcript)
+    else:
+        _, count = parse_html_file(args.source, output_file)
+    print(f"已提取 {count} 条对话并保存到 {output_file}")
+
+
+if __name__ == "__main__":
+    main()
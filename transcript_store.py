@@ -0,0 +1,245 @@
+import bisect
+import hashlib
+
+# 无法解析的时间排在最后
+UNKNOWN_TIME_SECONDS = float("inf")
+
+_FINGERPRINT_MASK = (1 << 64) - 1
+
+
+def parse_time_to_seconds(timestamp):
+    """
+    将 "HH:MM:SS" 或 "MM:SS" 格式的时间转换为秒数
+
+    Args:
+        timestamp: 时间字符串
+
+    Returns:
+        int: 秒数，无法解析时返回 None
+    """
+    if not timestamp:
+        return None
+    seconds = 0
+    try:
+        for part in timestamp.strip().split(":"):
+            seconds = seconds * 60 + int(part)
+    except ValueError:
+        return None
+    return seconds
+
+
+def record_hash(speaker, timestamp, content):
+    """计算单条对话的64位哈希，用于滚动指纹"""
+    digest = hashlib.blake2b(f"{speaker}\x1f{timestamp}\x1f{content}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class TranscriptStore:
+    """
+    会议记录存储
+
+    - 以 (说话人, 时间) 为键的哈希索引，查找已有对话为 O(1)
+    - 按解析后的秒数有序插入，同一时间的对话保持先后到达顺序
+    - 滚动指纹：所有对话哈希之和（模 2^64），新增或更新对话时 O(1) 更新
+    - 已定稿的对话可以从内存中移除，只保留键用于去重；
+      移除后 len() 仍计入这些对话，但迭代和 to_list() 只返回仍在内存中的对话
+    - keep_longest 为 False 时不比较长度，同一对话的内容每次变化都以最新版本为准，
+      add_rows 返回捕获到的每个版本，交给提取结束后的对齐合并处理（参见 reconcile.py）
+    """
+
+    def __init__(self, keep_longest=True):
+        self.keep_longest = keep_longest
+        self._records = {}
+        self._hashes = {}
+        self._positions = {}
+        self._order = []
+        self._finalized = set()
+        self._seq = 0
+        self.fingerprint = 0
+
+    def __len__(self):
+        return len(self._records) + len(self._finalized)
+
+    def __contains__(self, key):
+        return key in self._records or key in self._finalized
+
+    @property
+    def resident_count(self):
+        """仍在内存中的对话数"""
+        return len(self._records)
+
+    @property
+    def finalized_count(self):
+        """已定稿并移出内存的对话数"""
+        return len(self._finalized)
+
+    def __iter__(self):
+        for _, _, key in self._order:
+            yield self._records[key]
+
+    def get(self, speaker, timestamp):
+        return self._records.get((speaker, timestamp))
+
+    def upsert(self, speaker, timestamp, content):
+        """
+        新增一条对话，或在内容更长时（keep_longest 为 False 时为内容变化时）更新已有对话
+
+        Returns:
+            str: "new" 表示新增，"updated" 表示更新，None 表示没有变化
+        """
+        key = (speaker, timestamp)
+        if key in self._finalized:
+            return None
+        existing = self._records.get(key)
+        if existing is not None:
+            if self.keep_longest and len(content) <= len(existing['content']):
+                return None
+            if content == existing['content']:
+                return None
+            existing['content'] = content
+            new_hash = record_hash(speaker, timestamp, content)
+            self.fingerprint = (self.fingerprint - self._hashes[key] + new_hash) & _FINGERPRINT_MASK
+            self._hashes[key] = new_hash
+            return "updated"
+
+        self._records[key] = {
+            'speaker': speaker,
+            'time': timestamp,
+            'content': content
+        }
+        new_hash = record_hash(speaker, timestamp, content)
+        self._hashes[key] = new_hash
+        self.fingerprint = (self.fingerprint + new_hash) & _FINGERPRINT_MASK
+
+        seconds = parse_time_to_seconds(timestamp)
+        if seconds is None:
+            seconds = UNKNOWN_TIME_SECONDS
+        self._seq += 1
+        position = (seconds, self._seq, key)
+        self._positions[key] = position
+        bisect.insort(self._order, position)
+        return "new"
+
+    def finalize(self, keys):
+        """
+        将对话标记为定稿并移出内存，之后同一 (说话人, 时间) 的内容不再更新
+
+        调用方需确保这些对话已经交给输出保存。
+
+        Returns:
+            list: 被移出的对话
+        """
+        evicted = []
+        for key in keys:
+            record = self._records.pop(key, None)
+            if record is None:
+                continue
+            del self._hashes[key]
+            position = self._positions.pop(key)
+            index = bisect.bisect_left(self._order, position)
+            del self._order[index]
+            self._finalized.add(key)
+            evicted.append(record)
+        return evicted
+
+    def add_rows(self, rows):
+        """
+        批量保存一次读取到的段落，跳过缺少说话人、时间或内容的段落
+
+        同一批次中先新增后又变长的对话只计为新增。
+
+        Args:
+            rows: (说话人, 时间, 内容) 元组列表
+
+        Returns:
+            tuple: (新增数量, 更新数量, 新增或更新后的对话列表)；
+                   keep_longest 为 False 时对话列表包含这一批次中每个新的版本
+        """
+        new_keys = set()
+        updated_keys = set()
+        changed = {}
+        versions = []
+        for speaker, timestamp, content in rows:
+            if not (speaker and timestamp and content):
+                continue
+            status = self.upsert(speaker, timestamp, content)
+            if status is None:
+                continue
+            key = (speaker, timestamp)
+            if status == "new":
+                new_keys.add(key)
+            elif key not in new_keys:
+                updated_keys.add(key)
+            changed[key] = self._records[key]
+            versions.append(dict(self._records[key]))
+        return len(new_keys), len(updated_keys), list(changed.values()) if self.keep_longest else versions
+
+    def fingerprint_hex(self):
+        return f"{self.fingerprint:016x}"
+
+    def to_list(self):
+        """按时间顺序返回所有对话"""
+        return list(self)
+
+
+class RowFinalizer:
+    """
+    跟踪已提取但尚未定稿的段落，实现按虚拟列表行的增量提取
+
+    段落离开虚拟列表的渲染范围后即定稿：页面脚本之后只读取它的键而不再读取内容，
+    输出已保存该段落时（sink.persists_records 为真）还会把它从 TranscriptStore 中移除，
+    这样每一步的工作量和内存只与新出现的段落数相关，而与会议总长度无关。
+    """
+
+    def __init__(self, store, sink=None):
+        self.store = store
+        self.evict = bool(getattr(sink, 'persists_records', False))
+        self.pending = set()
+        self.finalized_total = 0
+        self._outbox = []
+
+    @staticmethod
+    def page_key(key):
+        """(说话人, 时间) 对应的页面脚本中的键"""
+        return f"{key[0]}\x01{key[1]}"
+
+    def take_outbox(self):
+        """返回并清空需要通知页面的新定稿段落键"""
+        outbox, self._outbox = self._outbox, []
+        return outbox
+
+    def update(self, rows, rendered_keys):
+        """
+        记录本次读取到的段落，并把已不在渲染范围内的段落定稿
+
+        Args:
+            rows: 本次读取到的 (说话人, 时间, 内容)
+            rendered_keys: 页面当前渲染的段落键；None 表示未知，此时不定稿
+
+        Returns:
+            int: 本次定稿的段落数
+        """
+        for speaker, timestamp, content in rows:
+            if speaker and timestamp and content:
+                self.pending.add((speaker, timestamp))
+        if rendered_keys is None:
+            return 0
+        rendered = set(rendered_keys)
+        done = [key for key in self.pending if self.page_key(key) not in rendered]
+        return self._finalize(done)
+
+    def finalize_all(self):
+        """定稿所有尚未定稿的段落（包括从检查点恢复的段落）"""
+        keys = set(self.pending)
+        keys.update((record['speaker'], record['time']) for record in self.store)
+        return self._finalize(keys)
+
+    def _finalize(self, keys):
+        if not keys:
+            return 0
+        self.pending.difference_update(keys)
+        if self.evict:
+            self.store.finalize(keys)
+        self._outbox.extend(self.page_key(key) for key in keys)
+        self.finalized_total += len(keys)
+        return len(keys)